@@ -0,0 +1,114 @@
+# Allocation check for EdidParser.parse_into().
+#
+#   python -m benchmarks.allocations --size 10000
+#
+# Parses the binary EDIDs of a synthetic corpus with tracemalloc running and reports the memory still held afterwards
+# (retained) and the high-water mark above the starting point (peak). Outputs are allocated before measuring. Every
+# case runs over the first half of the corpus and over the whole corpus, and the difference divided by the extra
+# records is the cost per record: fixed costs such as a temporary bytes object or a freelist refill cancel out, so the
+# figure does not depend on the corpus size. parse_into() must stay near zero per record while EDID().parse() grows
+# with every kept result. Exits with status 1 when a parse_into() case peaks above --limit bytes per extra record.
+
+
+import argparse
+import sys
+import tracemalloc
+
+from pyedid import EDID
+from pyedid import arrays
+from pyedid.parser import EdidParser
+from benchmarks import corpus
+from benchmarks.run import well_formed
+
+
+def case_parse(blobs, parser):
+    results = [None] * len(blobs)
+    start()
+    for i, blob in enumerate(blobs):
+        results[i] = EDID(blob).parse()
+    return stop()
+
+
+def case_dict(blobs, parser):
+    out = dict.fromkeys(parser.fields)
+    parse_into = parser.parse_into
+    start()
+    for blob in blobs:
+        parse_into(blob, out)
+    return stop()
+
+
+def case_array(blobs, parser):
+    out = arrays.np.zeros(len(blobs), dtype=arrays.RECORD_DTYPE)
+    parse_into = parser.parse_into
+    start()
+    for i, blob in enumerate(blobs):
+        parse_into(blob, out[i])
+    return stop()
+
+
+# name: (function, checked against --limit)
+CASES = {
+    "parse": (case_parse, False),
+    "parse_into/dict": (case_dict, True),
+}
+if arrays.np is not None:
+    CASES["parse_into/array"] = (case_array, True)
+
+baseline = [0]
+
+
+def start():
+    tracemalloc.reset_peak()
+    baseline[0] = tracemalloc.get_traced_memory()[0]
+
+
+def stop():
+    current, peak = tracemalloc.get_traced_memory()
+    return current - baseline[0], peak - baseline[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure memory allocated per parsed EDID")
+    parser.add_argument("--size", type=lambda value: int(float(value)), default=10000,
+                        help="corpus size (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: %(default)s)")
+    parser.add_argument("--limit", type=float, default=1.0,
+                        help="allowed parse_into() peak growth in bytes per record (default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    blobs = [bytes.fromhex(record) for record in well_formed(corpus.generate(args.size, args.seed))]
+    edid_parser = EdidParser(checksum=False)
+    # Fill the lookup tables first
+    out = {}
+    for blob in blobs:
+        edid_parser.parse_into(blob, out)
+
+    small = blobs[:len(blobs) // 2]
+    extra = len(blobs) - len(small)
+    if not small:
+        parser.error("--size leaves no well-formed records to compare")
+
+    failed = False
+    tracemalloc.start()
+    try:
+        for name, (func, checked) in CASES.items():
+            # Warm-up run, then the half and the whole corpus
+            func(small, edid_parser)
+            small_retained, small_peak = func(small, edid_parser)
+            retained, peak = func(blobs, edid_parser)
+            per_record = (peak - small_peak) / extra
+            status = ""
+            if checked:
+                status = "ok" if per_record <= args.limit else "FAIL"
+                failed = failed or status == "FAIL"
+            sys.stdout.write("%-18s %8d records  retained %10.2f B/record  peak %10.2f B/record  (%d / %d B)  %s\n"
+                             % (name, len(blobs), (retained - small_retained) / extra, per_record, small_peak, peak,
+                                status))
+    finally:
+        tracemalloc.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,146 @@
+# Benchmark regression comparator.
+#
+#   python -m benchmarks.compare benchmarks/baselines/1.0.0.json bench.json --threshold 5
+#
+# Compares the throughput samples of two result files produced by benchmarks.run. A case is only reported as a
+# regression when it is slower than the threshold *and* the confidence interval of the difference of means (Welch's
+# t-test over the repeated runs) lies entirely below zero, so run-to-run noise does not fail the check.
+# Exits with status 1 when any case regressed.
+
+
+import argparse
+import json
+import math
+import statistics
+import sys
+
+REGRESSION = "regression"
+IMPROVEMENT = "improvement"
+UNCHANGED = "unchanged"
+MISSING = "missing"
+
+
+def load(path):
+    with open(path) as f:
+        report = json.load(f)
+    if "results" not in report:
+        raise ValueError("%s is not a benchmark result file" % path)
+    return report
+
+
+# Student's t quantile. Exact for 1 and 2 degrees of freedom, Cornish-Fisher expansion otherwise
+def t_quantile(p, df):
+    if df == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if df == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+    z = statistics.NormalDist().inv_cdf(p)
+    return (z
+            + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
+
+
+# Confidence interval of mean(new) - mean(base), None when either side has a single sample
+def welch_interval(base, new, confidence):
+    if len(base) < 2 or len(new) < 2:
+        return None
+    var_base = statistics.variance(base) / len(base)
+    var_new = statistics.variance(new) / len(new)
+    diff = statistics.mean(new) - statistics.mean(base)
+    se = math.sqrt(var_base + var_new)
+    if not se:
+        return diff, diff
+    df = (var_base + var_new) ** 2 / (
+        var_base ** 2 / (len(base) - 1) + var_new ** 2 / (len(new) - 1))
+    margin = t_quantile(1 - (1 - confidence) / 2, max(1, int(df))) * se
+    return diff - margin, diff + margin
+
+
+def samples(result):
+    return result.get("samples") or [result["ops_per_s"]]
+
+
+def compare_case(base, new, threshold, confidence):
+    base_samples = samples(base)
+    new_samples = samples(new)
+    base_mean = statistics.mean(base_samples)
+    new_mean = statistics.mean(new_samples)
+    delta = (new_mean - base_mean) / base_mean if base_mean else 0.0
+    interval = welch_interval(base_samples, new_samples, confidence)
+
+    status = UNCHANGED
+    if delta < -threshold and (interval is None or interval[1] < 0):
+        status = REGRESSION
+    elif delta > threshold and (interval is None or interval[0] > 0):
+        status = IMPROVEMENT
+
+    return {
+        "status": status,
+        "base_ops_per_s": base_mean,
+        "new_ops_per_s": new_mean,
+        "delta": delta,
+        "ci_low": interval[0] / base_mean if interval and base_mean else None,
+        "ci_high": interval[1] / base_mean if interval and base_mean else None,
+        "base_p99_us": base.get("p99_us"),
+        "new_p99_us": new.get("p99_us"),
+    }
+
+
+def compare(base, new, threshold=0.05, confidence=0.95, benchmarks=None):
+    cases = {}
+    for key in sorted(set(base["results"]) | set(new["results"])):
+        name = key.split("/")[0]
+        if benchmarks and name not in benchmarks:
+            continue
+        if key not in base["results"] or key not in new["results"]:
+            cases[key] = {"status": MISSING}
+            continue
+        cases[key] = compare_case(base["results"][key], new["results"][key], threshold, confidence)
+    return cases
+
+
+def format_pct(value):
+    return "%+7.2f%%" % (value * 100) if value is not None else "       -"
+
+
+def print_table(cases, out=sys.stdout):
+    out.write("%-24s %13s %13s %9s %22s  %s\n" % ("case", "base ops/s", "new ops/s", "delta", "CI", "status"))
+    for key, case in cases.items():
+        if case["status"] == MISSING:
+            out.write("%-24s %13s %13s %9s %22s  %s\n" % (key, "-", "-", "-", "-", MISSING))
+            continue
+        out.write("%-24s %13.0f %13.0f %9s %10s..%10s  %s\n" % (
+            key, case["base_ops_per_s"], case["new_ops_per_s"], format_pct(case["delta"]),
+            format_pct(case["ci_low"]), format_pct(case["ci_high"]), case["status"]))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two pyedid benchmark result files")
+    parser.add_argument("base", help="baseline result JSON")
+    parser.add_argument("new", help="candidate result JSON")
+    parser.add_argument("--threshold", type=float, default=5.0,
+                        help="minimal slowdown in percent to count as a regression (default: %(default)s)")
+    parser.add_argument("--confidence", type=float, default=0.95,
+                        help="confidence level of the interval (default: %(default)s)")
+    parser.add_argument("--benchmarks", help="comma separated benchmark names to compare, e.g. parse")
+    parser.add_argument("--json", action="store_true", help="print the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    if not 0 < args.confidence < 1:
+        parser.error("--confidence must be between 0 and 1")
+
+    benchmarks = [name for name in args.benchmarks.split(",") if name] if args.benchmarks else None
+    cases = compare(load(args.base), load(args.new), args.threshold / 100, args.confidence, benchmarks)
+
+    if args.json:
+        json.dump(cases, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        print_table(cases)
+
+    return 1 if any(case["status"] == REGRESSION for case in cases.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# Deterministic synthetic EDID corpus generator.
+#
+# Every record is produced from a seeded random.Random, so the same (seed, size) pair always yields the same corpus
+# and benchmark numbers can be compared across commits.
+
+
+import random
+from pyedid.pnp_id_list import registry
+
+HEADER = bytes([0x00, 0xff, 0xff, 0xff, 0xff, 0xff, 0xff, 0x00])
+
+# Share of malformed records in a default corpus
+MALFORMED_RATIO = 0.02
+
+MALFORMED_KINDS = ("bad_header", "truncated", "bad_checksum", "invalid_hex", "odd_length")
+
+# Detailed timings commonly found in the wild: pixel clock (10 kHz), h_active, h_blanking, v_active, v_blanking,
+# h_front_porch, h_pulse_width, v_front_porch, v_pulse_width
+DETAILED_TIMINGS = (
+    (2517, 640, 160, 480, 45, 16, 96, 10, 2),
+    (6500, 1024, 320, 768, 38, 24, 136, 3, 6),
+    (10800, 1280, 408, 1024, 42, 48, 112, 1, 3),
+    (14850, 1920, 280, 1080, 45, 88, 44, 4, 5),
+    (24150, 2560, 160, 1440, 41, 48, 32, 3, 5),
+    (59236, 2560, 106, 1440, 103, 21, 32, 3, 5),
+    (53325, 3840, 160, 2160, 62, 48, 32, 3, 5),
+    (7425, 1920, 280, 540, 22, 88, 44, 2, 5),
+)
+
+ASCII_DESCRIPTORS = (0xfc, 0xfe, 0xff)
+HEX_DESCRIPTORS = (0xfb, 0xfa, 0xf9, 0xf8, 0xf7, 0x10)
+
+MANUFACTURERS = sorted(registry.keys())
+
+
+def checksum(block):
+    return (256 - sum(block[:127]) % 256) % 256
+
+
+def manufacturer_bytes(code):
+    value = 0
+    for char in code:
+        value = value << 5 | (ord(char) - 64) & 0b11111
+    return [value >> 8 & 0xff, value & 0xff]
+
+
+def detailed_timing(rnd):
+    clock, h_act, h_blank, v_act, v_blank, h_fp, h_pw, v_fp, v_pw = rnd.choice(DETAILED_TIMINGS)
+    h_img = rnd.randint(200, 1200)
+    v_img = rnd.randint(150, 700)
+    features = rnd.choice((0x18, 0x1a, 0x1e, 0x9e, 0x0a, 0x12, 0x7e))
+    return [
+        clock & 0xff, clock >> 8 & 0xff,
+        h_act & 0xff, h_blank & 0xff, (h_act >> 8 & 0x0f) << 4 | h_blank >> 8 & 0x0f,
+        v_act & 0xff, v_blank & 0xff, (v_act >> 8 & 0x0f) << 4 | v_blank >> 8 & 0x0f,
+        h_fp & 0xff, h_pw & 0xff, (v_fp & 0x0f) << 4 | v_pw & 0x0f,
+        (h_fp >> 8 & 0b11) << 6 | (h_pw >> 8 & 0b11) << 4 | (v_fp >> 4 & 0b11) << 2 | v_pw >> 4 & 0b11,
+        h_img & 0xff, v_img & 0xff, (h_img >> 8 & 0x0f) << 4 | v_img >> 8 & 0x0f,
+        0, 0, features,
+    ]
+
+
+def range_limits(rnd):
+    min_v = rnd.choice((24, 48, 50, 56))
+    max_v = rnd.choice((60, 75, 120, 144, 165))
+    min_h = rnd.choice((15, 30, 31))
+    max_h = rnd.choice((80, 110, 160, 223))
+    clock = rnd.choice((17, 30, 60))
+    extended = rnd.choice((0x00, 0x01, 0x02, 0x04))
+    return [0, 0, 0, 0xfd, 0, min_v, max_v, min_h, max_h, clock, extended,
+            0x0a, 0x20, 0x20, 0x20, 0x20, 0x20, 0x20]
+
+
+def ascii_descriptor(rnd, tag):
+    text = "".join(rnd.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 -") for _ in range(rnd.randint(1, 13)))
+    payload = [ord(c) for c in text]
+    if len(payload) < 13:
+        payload.append(0x0a)
+    payload += [0x20] * (13 - len(payload))
+    return [0, 0, 0, tag, 0] + payload
+
+
+def hex_descriptor(rnd, tag):
+    return [0, 0, 0, tag, 0] + [rnd.randint(0, 255) for _ in range(13)]
+
+
+def descriptors(rnd):
+    slots = [detailed_timing(rnd)]
+    pool = [
+        lambda: detailed_timing(rnd),
+        lambda: range_limits(rnd),
+        lambda: ascii_descriptor(rnd, rnd.choice(ASCII_DESCRIPTORS)),
+        lambda: hex_descriptor(rnd, rnd.choice(HEX_DESCRIPTORS)),
+        lambda: [0] * 18,
+    ]
+    for _ in range(3):
+        slots.append(rnd.choice(pool)())
+    return slots
+
+
+def standard_timings(rnd):
+    timings = []
+    for _ in range(8):
+        if rnd.random() < 0.4:
+            timings += [0x01, 0x01]
+        else:
+            timings += [rnd.randint(0x31, 0xd1), rnd.randint(0, 3) << 6 | rnd.randint(0, 63)]
+    return timings
+
+
+def extension_block(rnd):
+    # CEA-861 style block: tag, revision, DTD offset, flags, padding with a few SVDs
+    svds = [rnd.randint(1, 107) for _ in range(rnd.randint(1, 12))]
+    block = [0x02, 0x03, 5 + len(svds), 0xf0, 0x40 | len(svds)] + svds
+    block += [0] * (127 - len(block))
+    block.append(checksum(block))
+    return block
+
+
+def base_block(rnd, extensions):
+    digital = rnd.random() < 0.8
+    revision = rnd.choice((3, 4)) if digital else rnd.choice((1, 2, 3))
+    block = list(HEADER)
+    block += manufacturer_bytes(rnd.choice(MANUFACTURERS))
+    product = rnd.randint(0, 0xffff)
+    block += [product & 0xff, product >> 8]
+    serial = rnd.choice((0, rnd.randint(1, 0xffffffff)))
+    block += [serial & 0xff, serial >> 8 & 0xff, serial >> 16 & 0xff, serial >> 24 & 0xff]
+    block += [rnd.randint(0, 54), rnd.randint(0, 35), 1, revision]
+    if digital:
+        video_input = 0x80 | rnd.randint(0, 6) << 4 | rnd.randint(0, 5)
+    else:
+        video_input = rnd.randint(0, 0x1f) | rnd.randint(0, 3) << 5
+    block += [video_input, rnd.randint(0, 120), rnd.randint(0, 70), rnd.randint(0, 255), rnd.randint(0, 255)]
+    block += [rnd.randint(0, 255) for _ in range(10)]
+    block += [rnd.randint(0, 255), rnd.randint(0, 255), rnd.randint(0, 1) << 7]
+    block += standard_timings(rnd)
+    for slot in descriptors(rnd):
+        block += slot
+    block += [extensions]
+    block.append(checksum(block))
+    return block
+
+
+def record(rnd):
+    extensions = rnd.choice((0, 0, 1, 1, 1, 2, 3))
+    data = base_block(rnd, extensions)
+    for _ in range(extensions):
+        data += extension_block(rnd)
+    return bytes(data)
+
+
+def malformed(rnd, kind):
+    data = bytearray(record(rnd))
+    if kind == "bad_header":
+        data[rnd.randint(0, 7)] ^= 0x5a
+    elif kind == "truncated":
+        data = data[:rnd.randint(1, 127)]
+    elif kind == "bad_checksum":
+        data[127] = (data[127] + 1) % 256
+    hex_str = data.hex()
+    if kind == "invalid_hex":
+        pos = rnd.randrange(16, len(hex_str))
+        hex_str = hex_str[:pos] + rnd.choice("gxz?") + hex_str[pos + 1:]
+    elif kind == "odd_length":
+        hex_str = hex_str[:-1]
+    return hex_str
+
+
+# List of `size` EDID hex strings, deterministic for a given seed. duplicate_ratio is the share of records repeating
+# an earlier one, as in fleet telemetry where one monitor model shows up on many desks
+def generate(size, seed=0, malformed_ratio=MALFORMED_RATIO, duplicate_ratio=0.0):
+    rnd = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        if duplicate_ratio and corpus and rnd.random() < duplicate_ratio:
+            corpus.append(corpus[rnd.randrange(len(corpus))])
+        elif rnd.random() < malformed_ratio:
+            corpus.append(malformed(rnd, rnd.choice(MALFORMED_KINDS)))
+        else:
+            corpus.append(record(rnd).hex())
+    return corpus
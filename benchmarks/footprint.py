@@ -0,0 +1,185 @@
+# Memory footprint of parsed EDIDs.
+#
+#   python -m benchmarks.footprint --size 2000 -o footprint.json
+#
+# For every output representation the corpus is parsed and all results are kept. Reports bytes per record measured
+# two ways: tracemalloc (everything allocated and still held) and a sys.getsizeof walk over the kept objects, where
+# objects shared between records (interned keys, small ints, cached strings) are counted once. The walk over
+# EDID objects with their parse() results is broken down by field to show where the memory goes.
+
+
+import argparse
+import json
+import sys
+import tracemalloc
+from types import MappingProxyType
+
+from pyedid import EDID
+from pyedid import arrays
+from pyedid.parser import EdidParser
+from benchmarks import corpus
+from benchmarks.run import well_formed
+
+TIMING_LISTS = ("timings", "standard_timings", "established_timings")
+
+
+def build_edid(records):
+    return [EDID(record) for record in records]
+
+
+def build_edid_parse(records):
+    edids = [EDID(record) for record in records]
+    for edid in edids:
+        edid.parse()
+    return edids
+
+
+def build_parse(records):
+    return [EDID(record).parse() for record in records]
+
+
+def build_frozen(records):
+    return [EDID(record).parse(frozen=True) for record in records]
+
+
+def build_identify(records):
+    return [EDID(record).identify() for record in records]
+
+
+def build_raw(records):
+    return [bytes.fromhex(record) for record in records]
+
+
+def build_parser(records):
+    parser = EdidParser(checksum=False)
+    return [parser.parse_into(record, {}) for record in records]
+
+
+def build_records(records):
+    return arrays.to_records(records)
+
+
+# name: builder of the kept results
+REPRESENTATIONS = {
+    "EDID()": build_edid,
+    "EDID().parse() kept": build_edid_parse,
+    "parse() dict": build_parse,
+    "parse(frozen=True)": build_frozen,
+    "identify() dict": build_identify,
+    "raw bytes": build_raw,
+    "EdidParser dict": build_parser,
+}
+if arrays.np is not None:
+    REPRESENTATIONS["to_records() row"] = build_records
+
+
+def category(key, value, parent):
+    # Breakdown bucket of a value reached through `key`, None to inherit the parent's bucket
+    if isinstance(value, (dict, MappingProxyType)) and "bin" in value:
+        return "combine dicts"
+    if parent == "data dict":
+        if key == "detailed_timings":
+            return "detailed timing dicts"
+        if key in TIMING_LISTS:
+            return "timing strings"
+        if key == "descriptors":
+            return "descriptors"
+        return "other fields"
+    return None
+
+
+def walk(obj, bucket, seen, totals):
+    # Adds sys.getsizeof() of obj and everything it references to totals[bucket], once per object
+    if id(obj) in seen:
+        return
+    seen.add(id(obj))
+    totals[bucket] = totals.get(bucket, 0) + sys.getsizeof(obj)
+    if isinstance(obj, (dict, MappingProxyType)):
+        if isinstance(obj, MappingProxyType):
+            # The proxied dict is not reachable, a copy of it stands in
+            totals[bucket] += sys.getsizeof(dict(obj))
+        for key, value in obj.items():
+            walk(key, bucket, seen, totals)
+            walk(value, category(key, value, bucket) or bucket, seen, totals)
+    elif isinstance(obj, (list, tuple)):
+        for item in obj:
+            walk(item, category(None, item, bucket) or bucket, seen, totals)
+    elif isinstance(obj, EDID):
+        for name, value in vars(obj).items():
+            if name == "data":
+                walk(value, "data dict", seen, totals)
+            elif name == "_bytes":
+                walk(value, "self.bytes list", seen, totals)
+            elif name in ("_hex", "_raw"):
+                walk(value, "hex / raw input", seen, totals)
+            else:
+                walk(value, bucket, seen, totals)
+        # Instance attribute dict
+        totals[bucket] += sys.getsizeof(vars(obj))
+
+
+def measure(build, records):
+    # Bytes allocated by tracemalloc and kept by the results, without the list holding them
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        results = build(records)
+        traced = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    if isinstance(results, list):
+        traced -= sys.getsizeof(results)
+    return traced, results
+
+
+def breakdown(results):
+    # getsizeof walk of the results by bucket, without the list holding them
+    if not isinstance(results, list):
+        return {"array rows": results.nbytes}
+    totals = {}
+    seen = {id(results)}
+    for result in results:
+        if isinstance(result, EDID):
+            walk(result, "EDID object", seen, totals)
+        elif isinstance(result, (dict, MappingProxyType)):
+            walk(result, "data dict", seen, totals)
+        else:
+            walk(result, "result", seen, totals)
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the memory footprint of parsed EDIDs")
+    parser.add_argument("--size", type=lambda value: int(float(value)), default=2000,
+                        help="corpus size (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: %(default)s)")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    records = well_formed(corpus.generate(args.size, args.seed))
+    count = len(records)
+    report = {"size": count, "seed": args.seed, "representations": {}, "breakdown": {}}
+    for name, build in REPRESENTATIONS.items():
+        traced, results = measure(build, records)
+        totals = breakdown(results)
+        walked = sum(totals.values())
+        report["representations"][name] = {
+            "tracemalloc_bytes": traced / count,
+            "getsizeof_bytes": walked / count,
+        }
+        sys.stdout.write("%-22s tracemalloc %9.1f B/record  getsizeof walk %9.1f B/record\n"
+                         % (name, traced / count, walked / count))
+        if build is build_edid_parse:
+            report["breakdown"] = {bucket: size / count for bucket, size in totals.items()}
+        results = None
+
+    sys.stdout.write("\nEDID().parse() kept, by field (getsizeof walk):\n")
+    for bucket, size in sorted(report["breakdown"].items(), key=lambda item: -item[1]):
+        sys.stdout.write("  %-24s %9.1f B/record\n" % (bucket, size))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,317 @@
+# Benchmark runner.
+#
+#   python -m benchmarks.run --sizes 1000,10000,100000 --repeat 5 --output bench.json
+#
+# Each (benchmark, size) case runs in a forked child process so that the reported peak RSS belongs to that case
+# alone. Results are written as JSON and can be compared across commits.
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+import pyedid
+from pyedid import EDID, parse_batch, parse_dedup
+from pyedid import arrays
+from pyedid.batch import parse_record
+from pyedid.parser import EdidParser
+from benchmarks import corpus
+
+DEFAULT_SIZES = (1000, 10000, 100000)
+DEFAULT_CHUNK = 1000
+
+
+def parse_one(hex_str):
+    try:
+        return EDID(hex_str).parse()
+    except Exception:
+        return None
+
+
+def bench_construct(records, chunk, workers):
+    latencies = []
+    clock = time.perf_counter_ns
+    begin = clock()
+    for hex_str in records:
+        start = clock()
+        EDID(hex_str)
+        latencies.append(clock() - start)
+    return clock() - begin, latencies, 0, len(records)
+
+
+def bench_parse(records, chunk, workers):
+    edids = [EDID(hex_str) for hex_str in records]
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    begin = clock()
+    for edid in edids:
+        start = clock()
+        try:
+            edid.parse()
+        except Exception:
+            errors += 1
+        latencies.append(clock() - start)
+    return clock() - begin, latencies, errors, len(records)
+
+
+def bench_identify(records, chunk, workers):
+    edids = [EDID(hex_str) for hex_str in records]
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    begin = clock()
+    for edid in edids:
+        start = clock()
+        try:
+            edid.identify()
+        except Exception:
+            errors += 1
+        latencies.append(clock() - start)
+    return clock() - begin, latencies, errors, len(records)
+
+
+def bench_batch(records, chunk, workers):
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    begin = clock()
+    for i in range(0, len(records), chunk):
+        start = clock()
+        results, rejected = parse_batch(records[i:i + chunk])
+        latencies.append(clock() - start)
+        errors += len(rejected)
+    return clock() - begin, latencies, errors, len(records)
+
+
+def bench_dedup(records, chunk, workers):
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    begin = clock()
+    for i in range(0, len(records), chunk):
+        start = clock()
+        results, rejected, stats = parse_dedup(records[i:i + chunk])
+        latencies.append(clock() - start)
+        errors += len(rejected)
+    return clock() - begin, latencies, errors, len(records)
+
+
+def bench_parser(records, chunk, workers):
+    blobs = [bytes.fromhex(record) for record in well_formed(records)]
+    parser = EdidParser(checksum=False)
+    out = dict.fromkeys(parser.fields)
+    latencies = []
+    clock = time.perf_counter_ns
+    begin = clock()
+    for blob in blobs:
+        start = clock()
+        parser.parse_into(blob, out)
+        latencies.append(clock() - start)
+    return clock() - begin, latencies, 0, len(blobs)
+
+
+def bench_parallel(records, chunk, workers):
+    latencies = []
+    errors = 0
+    clock = time.perf_counter_ns
+    with multiprocessing.Pool(workers) as pool:
+        begin = start = clock()
+        for results in pool.imap(parse_chunk, chunks(records, chunk)):
+            now = clock()
+            latencies.append(now - start)
+            start = now
+            errors += results.count(None)
+        elapsed = clock() - begin
+    return elapsed, latencies, errors, len(records)
+
+
+def well_formed(records):
+    return [record for record in records if parse_record(record, checksum=False)[1] is None]
+
+
+def bench_records(records, chunk, workers):
+    latencies = []
+    clock = time.perf_counter_ns
+    records = well_formed(records)
+    begin = clock()
+    for i in range(0, len(records), chunk):
+        start = clock()
+        arrays.to_records(records[i:i + chunk])
+        latencies.append(clock() - start)
+    return clock() - begin, latencies, 0, len(records)
+
+
+def bench_shared(records, chunk, workers):
+    from pyedid.parallel import parallel_records
+
+    clock = time.perf_counter_ns
+    records = arrays.as_array(well_formed(records))
+    start = clock()
+    parallel_records(records, workers, chunk)
+    elapsed = clock() - start
+    return elapsed, [elapsed], 0, len(records)
+
+
+def parse_chunk(records):
+    return [parse_one(hex_str) for hex_str in records]
+
+
+def chunks(records, chunk):
+    for i in range(0, len(records), chunk):
+        yield records[i:i + chunk]
+
+
+# name: (function, latency unit). Functions return (elapsed ns, latencies ns, errors, records processed)
+BENCHMARKS = {
+    "construct": (bench_construct, "record"),
+    "parse": (bench_parse, "record"),
+    "identify": (bench_identify, "record"),
+    "batch": (bench_batch, "chunk"),
+    "dedup": (bench_dedup, "chunk"),
+    "parallel": (bench_parallel, "chunk"),
+    "parser": (bench_parser, "record"),
+}
+
+# Vectorized paths, only available with numpy. Invalid records are filtered out before timing, like for "parser"
+if arrays.np is not None:
+    BENCHMARKS["records"] = (bench_records, "chunk")
+    BENCHMARKS["shared"] = (bench_shared, "call")
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def run_case(name, size, seed, chunk, workers, duplicate_ratio):
+    records = corpus.generate(size, seed, duplicate_ratio=duplicate_ratio)
+    func, unit = BENCHMARKS[name]
+    elapsed, latencies, errors, processed = func(records, chunk, workers)
+    return {
+        # Benchmarks of the valid-only paths process fewer records than the corpus size
+        "records": processed,
+        "records_per_s": processed / (elapsed / 1e9),
+        "p50_us": percentile(latencies, 50) / 1000,
+        "p99_us": percentile(latencies, 99) / 1000,
+        "latency_unit": "chunk of %d" % chunk if unit == "chunk" else unit,
+        "errors": errors,
+        # ru_maxrss is in kilobytes on Linux, bytes on macOS
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // (1024 if sys.platform == "darwin" else 1),
+    }
+
+
+def _child(conn, *args):
+    try:
+        conn.send(run_case(*args))
+    finally:
+        conn.close()
+
+
+def run_isolated(*args):
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return run_case(*args)
+    ctx = multiprocessing.get_context("fork")
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child, args=(child,) + args)
+    process.start()
+    child.close()
+    result = parent.recv()
+    process.join()
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(names, sizes, repeat, seed, chunk, workers, duplicate_ratio=0.0, log=sys.stderr):
+    results = {}
+    for name in names:
+        for size in sizes:
+            samples = []
+            for _ in range(repeat):
+                samples.append(run_isolated(name, size, seed, chunk, workers, duplicate_ratio))
+            rates = sorted(sample["records_per_s"] for sample in samples)
+            key = "%s/%d" % (name, size)
+            results[key] = {
+                "benchmark": name,
+                "size": size,
+                "ops_per_s": rates[len(rates) // 2],
+                "samples": [sample["records_per_s"] for sample in samples],
+                "records": samples[0]["records"],
+                "p50_us": percentile([sample["p50_us"] for sample in samples], 50),
+                "p99_us": percentile([sample["p99_us"] for sample in samples], 50),
+                "latency_unit": samples[0]["latency_unit"],
+                "peak_rss_kb": max(sample["peak_rss_kb"] for sample in samples),
+                "errors": samples[0]["errors"],
+            }
+            if log:
+                log.write("%-24s %12.0f ops/s  p50 %9.2f us  p99 %9.2f us  rss %8d kB\n" % (
+                    key, results[key]["ops_per_s"], results[key]["p50_us"], results[key]["p99_us"],
+                    results[key]["peak_rss_kb"]))
+    return {
+        "meta": {
+            "pyedid": pyedid.__version__,
+            "commit": git_commit(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "seed": seed,
+            "duplicate_ratio": duplicate_ratio,
+            "repeat": repeat,
+            "chunk": chunk,
+            "workers": workers,
+        },
+        "results": results,
+    }
+
+
+def parse_sizes(value):
+    return [int(float(size)) for size in value.split(",") if size]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run pyedid benchmarks over a synthetic EDID corpus")
+    parser.add_argument("--benchmarks", default=",".join(BENCHMARKS),
+                        help="comma separated benchmark names (default: %(default)s)")
+    parser.add_argument("--sizes", type=parse_sizes, default=list(DEFAULT_SIZES),
+                        help="comma separated corpus sizes, e.g. 1e3,1e4,1e6")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed (default: %(default)s)")
+    parser.add_argument("--duplicates", type=float, default=0.0,
+                        help="share of corpus records repeating an earlier one (default: %(default)s)")
+    parser.add_argument("--chunk", type=int, default=DEFAULT_CHUNK, help="records per batch (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="parallel worker processes")
+    parser.add_argument("-o", "--output", help="write JSON results to this file")
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.benchmarks.split(",") if name]
+    for name in names:
+        if name not in BENCHMARKS:
+            parser.error("unknown benchmark %r" % name)
+
+    report = run(names, args.sizes, args.repeat, args.seed, args.chunk, args.workers, args.duplicates)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 from pyedid.edid import EDID
+from pyedid.batch import parse_batch, parse_dedup
 from pyedid.pnp_id_list import registry
 
 __version__ = '1.0.0'
@@ -6,3 +7,11 @@ __author__ = 'Andrey Izman'
 __email__ = 'izmanw@gmail.com'
 __license__ = 'LGPL v3.0'
 
+
+def __getattr__(name):
+    # The asyncio front-end is imported on first use, synchronous users do not pay for importing asyncio
+    if name in ("aparse", "ascan"):
+        from pyedid import aio
+        return getattr(aio, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
@@ -0,0 +1,83 @@
+# asyncio front-end. File reads and parse() calls run in an executor (the loop's default thread pool unless one is
+# given, pass a ProcessPoolExecutor to take parsing off the interpreter running the loop) so they never block the
+# event loop.
+
+
+import asyncio
+import glob
+import functools
+from pyedid.edid import EDID
+from pyedid.streams import open_input
+
+# DRM connectors expose the EDID of the attached display here, empty when nothing is connected
+SYSFS_PATTERN = "/sys/class/drm/*/edid"
+
+DEFAULT_CONCURRENCY = 8
+
+
+def load(path, parse=True):
+    # EDID of a binary EDID file (plain or compressed), None if the file is empty
+    with open_input(path) as f:
+        raw = f.read()
+    if not raw:
+        return None
+    edid = EDID(raw)
+    if parse:
+        edid.parse()
+    return edid
+
+
+def parse_edid(edid):
+    if not isinstance(edid, EDID):
+        edid = EDID(edid)
+    edid.parse()
+    return edid
+
+
+async def aparse(edid, executor=None):
+    # parse() of a hex string, binary EDID or EDID object in `executor`, returns the parsed EDID
+    return await asyncio.get_running_loop().run_in_executor(executor, parse_edid, edid)
+
+
+async def aread(path, executor=None, parse=True):
+    # Reads (and parses) a binary EDID file in `executor`, None for empty files
+    return await asyncio.get_running_loop().run_in_executor(executor, functools.partial(load, path, parse))
+
+
+async def ascan(paths=None, executor=None, concurrency=DEFAULT_CONCURRENCY, parse=True, skip_invalid=True):
+    # Yields (path, EDID) for every non-empty EDID file in completion order, by default every DRM connector in
+    # sysfs. At most `concurrency` files are read and parsed at a time. Unreadable files and invalid EDIDs are
+    # skipped unless skip_invalid is False. Leaving the loop early or cancelling the consumer cancels the reads that
+    # are still pending.
+    if paths is None:
+        paths = sorted(glob.glob(SYSFS_PATTERN))
+    loop = asyncio.get_running_loop()
+    paths = iter(paths)
+    pending = {}
+
+    def submit():
+        for path in paths:
+            future = loop.run_in_executor(executor, functools.partial(load, path, parse))
+            pending[future] = path
+            return True
+        return False
+
+    try:
+        while len(pending) < concurrency and submit():
+            pass
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                path = pending.pop(future)
+                submit()
+                try:
+                    edid = future.result()
+                except Exception:
+                    if not skip_invalid:
+                        raise
+                    continue
+                if edid is not None:
+                    yield path, edid
+    finally:
+        for future in pending:
+            future.cancel()
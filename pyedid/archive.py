@@ -0,0 +1,179 @@
+# Memory-mapped, indexed EDID archive.
+#
+# Layout (little-endian):
+#   header   magic, format version, index entry size, entry count, blob store offset, index offset
+#   blobs    deduplicated binary EDIDs, back to back
+#   index    (fingerprint, offset, length) entries sorted by fingerprint
+#
+# Archive opens the file with mmap, so archive[i] and archive.lookup(fingerprint) return EDID objects over zero-copy
+# memoryview slices of the mapping, and random access does not depend on the archive size.
+
+
+import mmap
+import os
+import struct
+import tempfile
+from pyedid.batch import decode, validate
+from pyedid.edid import EDID, InvalidEdidException, fingerprint
+
+MAGIC = b"PYEDIDA\x00"
+VERSION = 1
+HEADER = struct.Struct("<8sIIQQQ")
+ENTRY = struct.Struct("<QQI4x")
+
+
+class InvalidArchiveException(Exception):
+    pass
+
+
+def write_archive(path, edids, checksum=True):
+    # Writes hex strings, binary EDIDs or EDID objects to a new archive at `path`, replacing it atomically. Identical
+    # blobs are stored once. Returns the number of unique EDIDs. Records failing validation raise
+    # InvalidEdidException. To grow an archive, write its blobs() together with the new records
+    offsets = {}
+    entries = []
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".pyedid-archive-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(b"\x00" * HEADER.size)
+            position = HEADER.size
+            for index, edid in enumerate(edids):
+                if isinstance(edid, EDID):
+                    raw = edid.raw
+                else:
+                    raw, error = decode(edid)
+                    if error is not None:
+                        raise InvalidEdidException("Invalid EDID at index %d: %s at offset %s" % ((index,) + error))
+                raw = bytes(raw)
+                if raw in offsets:
+                    continue
+                error = validate(raw, checksum)
+                if error is not None:
+                    raise InvalidEdidException("Invalid EDID at index %d: %s at offset %s" % ((index,) + error))
+                offsets[raw] = position
+                entries.append((fingerprint(raw), position, len(raw)))
+                f.write(raw)
+                position += len(raw)
+
+            # 8-byte aligned index
+            padding = -position % 8
+            f.write(b"\x00" * padding)
+            index_offset = position + padding
+            entries.sort()
+            for entry in entries:
+                f.write(ENTRY.pack(*entry))
+
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, ENTRY.size, len(entries), HEADER.size, index_offset))
+        # mkstemp() creates the file private to the owner
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return len(entries)
+
+
+class Archive:
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.mmap = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file
+            self.file.close()
+            raise InvalidArchiveException("Not a pyedid archive: %s" % path)
+        if len(self.mmap) < HEADER.size:
+            self.close()
+            raise InvalidArchiveException("Not a pyedid archive: %s" % path)
+        magic, version, entry_size, self.count, self.blob_offset, self.index_offset = HEADER.unpack_from(self.mmap)
+        if magic != MAGIC or version != VERSION or entry_size != ENTRY.size:
+            self.close()
+            raise InvalidArchiveException("Not a pyedid archive: %s" % path)
+        # A truncated or corrupt index would make entry() read past the mapping
+        size = len(self.mmap)
+        if (not HEADER.size <= self.blob_offset <= self.index_offset <= size
+                or self.count > (size - self.index_offset) // ENTRY.size):
+            self.close()
+            raise InvalidArchiveException("Truncated or corrupt pyedid archive: %s" % path)
+        self.view = memoryview(self.mmap)
+
+    def __len__(self):
+        return self.count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        # EDID objects and blobs returned by the archive reference the mapping. While any of them is alive the mapping
+        # stays valid for them and is unmapped once the last one is garbage collected; the archive itself is closed
+        if getattr(self, "view", None) is not None:
+            self.view.release()
+            self.view = None
+        if self.mmap is not None:
+            try:
+                self.mmap.close()
+            except BufferError:  # Slices still exported
+                pass
+            self.mmap = None
+        self.file.close()
+
+    def entry(self, i):
+        # (fingerprint, offset, length) of the i-th entry, in fingerprint order
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("archive index out of range")
+        return ENTRY.unpack_from(self.mmap, self.index_offset + i * ENTRY.size)
+
+    def fingerprint(self, i):
+        return self.entry(i)[0]
+
+    def blob(self, i):
+        # Zero-copy memoryview of the i-th EDID
+        _, offset, length = self.entry(i)
+        return self.view[offset:offset + length]
+
+    def __getitem__(self, i):
+        return EDID(self.blob(i))
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def blobs(self):
+        for i in range(self.count):
+            yield self.blob(i)
+
+    def bisect(self, value):
+        # Position of the first entry with a fingerprint >= value
+        low, high = 0, self.count
+        unpack = ENTRY.unpack_from
+        base = self.index_offset
+        size = ENTRY.size
+        while low < high:
+            middle = (low + high) // 2
+            if unpack(self.mmap, base + middle * size)[0] < value:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup(self, value):
+        # EDID with the given fingerprint, None if absent. Use lookup_all() when several EDIDs (e.g. firmware
+        # revisions of one display) share a fingerprint
+        i = self.bisect(value)
+        if i < self.count and self.fingerprint(i) == value:
+            return self[i]
+        return None
+
+    def lookup_all(self, value):
+        edids = []
+        i = self.bisect(value)
+        while i < self.count and self.fingerprint(i) == value:
+            edids.append(self[i])
+            i += 1
+        return edids
@@ -0,0 +1,285 @@
+# Vectorized operations over batches of EDIDs. Requires numpy.
+
+
+from pyedid.batch import decode
+from pyedid.edid import EDID, InvalidEdidException, HEADER, DESCRIPTOR_OFFSETS, ESTABLISHED_TIMINGS, FNV_OFFSET, \
+    FNV_PRIME
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError("pyedid.arrays requires numpy")
+
+
+def as_array(edids):
+    # (N, 128) uint8 matrix of EDID base blocks. Accepts EDID objects, hex strings, bytes-like buffers or an existing
+    # 2-D uint8 array; extension blocks are dropped
+    require_numpy()
+    if isinstance(edids, np.ndarray):
+        if edids.ndim != 2 or edids.shape[1] < 128:
+            raise InvalidEdidException("Expected an (N, >=128) array of EDID bytes")
+        array = edids[:, :128].astype(np.uint8, copy=False)
+    else:
+        blocks = []
+        for row, edid in enumerate(edids):
+            if isinstance(edid, EDID):
+                raw = edid.raw
+            else:
+                raw, error = decode(edid)
+                if error is not None:
+                    raise InvalidEdidException("Invalid EDID format at index %d" % row)
+            if len(raw) < 128:
+                raise InvalidEdidException("Invalid EDID format at index %d" % row)
+            blocks.append(bytes(raw[:128]))
+        array = np.frombuffer(b"".join(blocks), dtype=np.uint8).reshape(len(blocks), 128)
+
+    invalid = np.flatnonzero((array[:, :8] != np.frombuffer(HEADER, dtype=np.uint8)).any(axis=1))
+    if len(invalid):
+        raise InvalidEdidException("Invalid EDID format at index %d" % invalid[0])
+    return array
+
+
+def descriptor_mask(array, tag):
+    # (N, 4) boolean matrix of the monitor descriptor slots carrying `tag`
+    mask = np.empty((len(array), len(DESCRIPTOR_OFFSETS)), dtype=bool)
+    for slot, i in enumerate(DESCRIPTOR_OFFSETS):
+        mask[:, slot] = ((array[:, i] == 0) & (array[:, i + 1] == 0) & (array[:, i + 2] == 0)
+                         & (array[:, i + 3] == tag) & (array[:, i + 4] == 0))
+    return mask
+
+
+def descriptor_texts(array, tag):
+    # (N, 13) matrix with the payload of the first descriptor carrying `tag`, zeroed from the terminator on;
+    # rows without such a descriptor are all zeros
+    mask = descriptor_mask(array, tag)
+    text = np.zeros((len(array), 13), dtype=np.uint8)
+    for slot in reversed(range(len(DESCRIPTOR_OFFSETS))):
+        i = DESCRIPTOR_OFFSETS[slot]
+        rows = mask[:, slot]
+        text[rows] = array[rows, i + 5:i + 18]
+    terminated = np.cumsum((text == 0x0a) | (text == 0x00), axis=1) > 0
+    text[terminated] = 0
+    return text
+
+
+def fingerprints(edids):
+    # Vectorized EDID.fingerprint(), returns a uint64 array with one fingerprint per EDID
+    array = as_array(edids)
+    columns = np.concatenate((array[:, 8:16], descriptor_texts(array, 0xff)), axis=1).T.astype(np.uint64)
+    value = np.full(len(array), FNV_OFFSET, dtype=np.uint64)
+    prime = np.uint64(FNV_PRIME)
+    for column in columns:
+        value ^= column
+        value *= prime
+    return value
+
+
+# One entry per descriptor slot, see decode_detailed_timings()
+TIMING_DTYPE = [
+    # False for monitor descriptors and unused slots
+    ("valid", "?"),
+    ("pixel_clock", "u4"),
+    ("frame_rate", "u2"),
+    ("h_active", "u2"),
+    ("h_blanking", "u2"),
+    ("v_active", "u2"),
+    ("v_blanking", "u2"),
+    ("h_front_porch", "u2"),
+    ("h_pulse_width", "u2"),
+    ("v_front_porch", "u1"),
+    ("v_pulse_width", "u1"),
+    ("h_image_size", "u2"),
+    ("v_image_size", "u2"),
+    ("h_border", "u1"),
+    ("v_border", "u1"),
+    ("interlaced", "?"),
+    ("stereo_mode", "u1"),
+    # Raw features bitmap (byte 17), sync details are encoded in bits 1-4
+    ("features", "u1"),
+]
+
+# One row per EDID, see to_records()
+RECORD_DTYPE = [
+    ("fingerprint", "u8"),
+    ("manufacturer_id", "U3"),
+    ("product_code", "u2"),
+    ("serial_number", "u4"),
+    ("week_of_manufacture", "u1"),
+    ("year_of_manufacture", "u2"),
+    ("edid_version", "u1"),
+    ("edid_revision", "u1"),
+    ("digital", "?"),
+    ("h_size", "u1"),
+    ("v_size", "u1"),
+    ("gamma", "u1"),
+    ("feature_standby", "?"),
+    ("feature_suspend", "?"),
+    ("feature_active_off", "?"),
+    ("display_type_bin", "u1"),
+    ("feature_srgb", "?"),
+    ("feature_preferred_timing_mode", "?"),
+    ("feature_default_gtf", "?"),
+    ("extensions", "u1"),
+    # First detailed timing, zeros when the EDID has none
+    ("pixel_clock", "u4"),
+    ("frame_rate", "u2"),
+    ("h_active", "u2"),
+    ("v_active", "u2"),
+    ("interlaced", "?"),
+    # Display range limits descriptor, zeros when absent
+    ("has_range_limits", "?"),
+    ("min_v_rate", "u2"),
+    ("max_v_rate", "u2"),
+    ("min_h_rate", "u2"),
+    ("max_h_rate", "u2"),
+    ("max_pixel_clock", "u4"),
+    ("extended_type", "u1"),
+    # Secondary GTF curve of extended_type 0x02 (start break frequency in kHz, C, M, K, J), zeros otherwise
+    ("gtf_start_break", "u2"),
+    ("gtf_c", "f4"),
+    ("gtf_m", "u2"),
+    ("gtf_k", "u1"),
+    ("gtf_j", "f4"),
+    # CVT support of extended_type 0x04, zeros otherwise. The CVT pixel clock limit is max_pixel_clock minus
+    # cvt_clock_reduction (kHz), cvt_max_h_active is 0 without a limit
+    ("cvt_clock_reduction", "u2"),
+    ("cvt_max_h_active", "u2"),
+    ("cvt_standard_blanking", "?"),
+    ("cvt_reduced_blanking", "?"),
+]
+
+
+def decode_detailed_timings(edids):
+    # (N, 4) structured array (TIMING_DTYPE) with the Detailed Timing Descriptors of the four 18-byte slots of every
+    # EDID, decoded with array operations. Slots holding monitor descriptors are masked out with valid = False.
+    array = as_array(edids)
+    slots = array[:, 0x36:0x7e].reshape(len(array), 4, 18)
+    u2 = np.uint16
+    u4 = np.uint32
+    timings = np.zeros(slots.shape[:2], dtype=TIMING_DTYPE)
+
+    # Pixel clock in 10 kHz units, 0 for monitor descriptors
+    pixel_clock = (slots[..., 0] | slots[..., 1].astype(u4) << 8) * u4(10000)
+    h_active = slots[..., 2] | (slots[..., 4] >> 4 & 0x0f).astype(u2) << 8
+    h_blanking = slots[..., 3] | (slots[..., 4] & 0x0f).astype(u2) << 8
+    v_active = slots[..., 5] | (slots[..., 7] >> 4 & 0x0f).astype(u2) << 8
+    v_blanking = slots[..., 6] | (slots[..., 7] & 0x0f).astype(u2) << 8
+    msbits = slots[..., 11]
+    total = (h_active + h_blanking).astype(np.float64) * (v_active + v_blanking)
+    features = slots[..., 17]
+
+    timings["valid"] = pixel_clock != 0
+    timings["pixel_clock"] = pixel_clock
+    timings["frame_rate"] = np.rint(np.divide(pixel_clock, total, out=np.zeros_like(total), where=total != 0))
+    timings["h_active"] = h_active
+    timings["h_blanking"] = h_blanking
+    timings["v_active"] = v_active
+    timings["v_blanking"] = v_blanking
+    timings["h_front_porch"] = slots[..., 8] | (msbits >> 6 & 0b11).astype(u2) << 8
+    timings["h_pulse_width"] = slots[..., 9] | (msbits >> 4 & 0b11).astype(u2) << 8
+    timings["v_front_porch"] = slots[..., 10] >> 4 & 0x0f | (msbits >> 2 & 0b11) << 4
+    timings["v_pulse_width"] = slots[..., 10] & 0x0f | (msbits & 0b11) << 4
+    timings["h_image_size"] = slots[..., 12] | (slots[..., 14] >> 4 & 0x0f).astype(u2) << 8
+    timings["v_image_size"] = slots[..., 13] | (slots[..., 14] & 0x0f).astype(u2) << 8
+    timings["h_border"] = slots[..., 15]
+    timings["v_border"] = slots[..., 16]
+    timings["interlaced"] = features >> 7 & 1
+    timings["stereo_mode"] = features >> 4 & 0b110 | features & 1
+    timings["features"] = features
+
+    # Keep masked slots all zeros
+    timings[~timings["valid"]] = 0
+    return timings
+
+
+def established_timings(edids):
+    # (N, 17) boolean matrix of the Established Timings bitmap (0x23-0x25), column j is ESTABLISHED_TIMINGS[j], e.g.
+    # established_timings(edids)[:, ESTABLISHED_TIMINGS.index("1024x768 @ 60Hz")].sum()
+    bits = np.unpackbits(as_array(edids)[:, 0x23:0x26], axis=1, bitorder="little")
+    # Bits 0-7 of 0x23 and 0x24, bit 7 of 0x25
+    return bits[:, list(range(16)) + [23]].view(bool)
+
+
+def manufacturer_ids(array):
+    # (N,) array of EISA 3-character manufacturer IDs
+    code = array[:, 8].astype(np.uint16) << 8 | array[:, 9]
+    chars = np.empty((len(array), 3), dtype=np.uint8)
+    chars[:, 0] = (code >> 10 & 0b11111) + 64
+    chars[:, 1] = (code >> 5 & 0b11111) + 64
+    chars[:, 2] = (code & 0b11111) + 64
+    return chars.view("S3").ravel().astype("U3")
+
+
+def to_records(edids):
+    # NumPy structured array with a fixed dtype (RECORD_DTYPE), one row per EDID. Columns are decoded straight from
+    # the base blocks with array operations and hold the same values as the matching parse() fields.
+    array = as_array(edids)
+    records = np.zeros(len(array), dtype=RECORD_DTYPE)
+    u2 = np.uint16
+    u4 = np.uint32
+
+    records["fingerprint"] = fingerprints(array)
+    records["manufacturer_id"] = manufacturer_ids(array)
+    records["product_code"] = array[:, 0x0a] | array[:, 0x0b].astype(u2) << 8
+    records["serial_number"] = (array[:, 0x0c] | array[:, 0x0d].astype(u4) << 8
+                                | array[:, 0x0e].astype(u4) << 16 | array[:, 0x0f].astype(u4) << 24)
+    records["week_of_manufacture"] = array[:, 0x10]
+    records["year_of_manufacture"] = array[:, 0x11] + u2(1990)
+    records["edid_version"] = array[:, 0x12]
+    records["edid_revision"] = array[:, 0x13]
+    records["digital"] = array[:, 0x14] >> 7 & 1
+    records["h_size"] = array[:, 0x15]
+    records["v_size"] = array[:, 0x16]
+    records["gamma"] = array[:, 0x17]
+
+    feature = array[:, 0x18]
+    records["feature_standby"] = feature >> 7 & 1
+    records["feature_suspend"] = feature >> 6 & 1
+    records["feature_active_off"] = feature >> 5 & 1
+    records["display_type_bin"] = feature >> 3 & 0b11
+    records["feature_srgb"] = feature >> 2 & 1
+    records["feature_preferred_timing_mode"] = feature >> 1 & 1
+    records["feature_default_gtf"] = feature & 1
+    records["extensions"] = array[:, 0x7e]
+
+    # Preferred timing: the first detailed timing
+    timings = decode_detailed_timings(array)
+    rows = np.flatnonzero(timings["valid"].any(axis=1))
+    preferred = timings[rows, timings["valid"][rows].argmax(axis=1)]
+    for field in ("pixel_clock", "frame_rate", "h_active", "v_active", "interlaced"):
+        records[field][rows] = preferred[field]
+
+    # Display range limits, the last descriptor wins as in parse()
+    for i in DESCRIPTOR_OFFSETS:
+        flags = array[:, i + 4]
+        rows = ((array[:, i] == 0) & (array[:, i + 1] == 0) & (array[:, i + 2] == 0)
+                & (array[:, i + 3] == 0xfd) & (flags >> 4 == 0))
+        h_offset = flags >> 2 & 0b11
+        v_offset = flags & 0b11
+        records["has_range_limits"][rows] = True
+        records["min_v_rate"][rows] = (array[:, i + 5] + np.where(v_offset == 0b11, 0xff, 0))[rows]
+        records["max_v_rate"][rows] = (array[:, i + 6] + np.where(v_offset == 0b10, 0xff, 0))[rows]
+        records["min_h_rate"][rows] = (array[:, i + 7] + np.where(h_offset == 0b11, 0xff, 0))[rows]
+        records["max_h_rate"][rows] = (array[:, i + 8] + np.where(h_offset == 0b10, 0xff, 0))[rows]
+        records["max_pixel_clock"][rows] = array[rows, i + 9].astype(u4) * 10000
+        records["extended_type"][rows] = array[rows, i + 10]
+        # Extended timing information in bytes 11-17, cleared for the other types
+        gtf = rows & (array[:, i + 10] == 0x02)
+        cvt = rows & (array[:, i + 10] == 0x04)
+        records["gtf_start_break"][rows] = np.where(gtf, array[:, i + 12].astype(u2) * 2, 0)[rows]
+        records["gtf_c"][rows] = np.where(gtf, array[:, i + 13] / 2, 0)[rows]
+        records["gtf_m"][rows] = np.where(gtf, array[:, i + 14] | array[:, i + 15].astype(u2) << 8, 0)[rows]
+        records["gtf_k"][rows] = np.where(gtf, array[:, i + 16], 0)[rows]
+        records["gtf_j"][rows] = np.where(gtf, array[:, i + 17] / 2, 0)[rows]
+        records["cvt_clock_reduction"][rows] = np.where(cvt, (array[:, i + 12] >> 2).astype(u2) * 250, 0)[rows]
+        records["cvt_max_h_active"][rows] = np.where(
+            cvt, ((array[:, i + 12] & 0b11).astype(u2) << 8 | array[:, i + 13]) * 8, 0)[rows]
+        records["cvt_standard_blanking"][rows] = (cvt & (array[:, i + 15] >> 4 & 1 == 1))[rows]
+        records["cvt_reduced_blanking"][rows] = (cvt & (array[:, i + 15] >> 3 & 1 == 1))[rows]
+
+    return records
@@ -0,0 +1,117 @@
+# Bulk parsing that never raises on bad records. Each record is decoded and validated (header, length, block
+# checksums) before any field decoding, and rejected records are reported as (index, reason, offset) errors.
+
+
+import collections
+import re
+from pyedid.edid import EDID, HEADER
+
+# Reason codes
+INVALID_HEX = "invalid_hex"
+TRUNCATED = "truncated"
+BAD_HEADER = "bad_header"
+BAD_CHECKSUM = "bad_checksum"
+DECODE_ERROR = "decode_error"
+
+# offset is in hex characters for INVALID_HEX and in bytes for every other reason
+BatchError = collections.namedtuple("BatchError", ("index", "reason", "offset"))
+
+# dedup_ratio is the share of records that were served from an already parsed duplicate
+DedupStats = collections.namedtuple("DedupStats", ("records", "unique", "dedup_ratio"))
+
+WHITESPACE = re.compile(r"\s+")
+NON_HEX = re.compile(r"[^0-9a-fA-F]")
+
+
+def decode(record):
+    # Binary EDID of a hex string or bytes-like record, returns (raw, None) or (None, (reason, offset))
+    if not isinstance(record, str):
+        return record, None
+    try:
+        # fromhex() skips whitespace between byte pairs by itself
+        return bytes.fromhex(record), None
+    except ValueError:
+        pass
+    hex_str = WHITESPACE.sub("", record)
+    try:
+        return bytes.fromhex(hex_str), None
+    except ValueError:
+        match = NON_HEX.search(hex_str)
+        # No foreign character means the string has an odd number of digits
+        return None, (INVALID_HEX, match.start() if match else len(hex_str) - 1)
+
+
+def validate(raw, checksum=True):
+    # (reason, offset) of the first problem found in a binary EDID, None if it is well formed
+    size = len(raw)
+    if raw[:8] != HEADER[:size]:
+        for offset in range(min(8, size)):
+            if raw[offset] != HEADER[offset]:
+                return BAD_HEADER, offset
+    if size < 128:
+        return TRUNCATED, size
+
+    # Base block + extension blocks announced at 0x7e
+    blocks = 1 + raw[0x7e]
+    if size < blocks * 128:
+        return TRUNCATED, size
+
+    if checksum:
+        for block in range(blocks):
+            start = block * 128
+            if sum(raw[start:start + 128]) & 0xff:
+                return BAD_CHECKSUM, start + 127
+
+    return None
+
+
+def parse_record(record, checksum=True, frozen=False):
+    # (parse() dict, None) or (None, (reason, offset)) for one hex string or binary EDID, see EDID.parse() for frozen
+    raw, error = decode(record)
+    if error is None:
+        error = validate(raw, checksum)
+    if error is not None:
+        return None, error
+    try:
+        return EDID(raw).parse(frozen), None
+    except Exception:
+        # Well formed blocks with inconsistent content, e.g. a detailed timing with zero total pixels
+        return None, (DECODE_ERROR, None)
+
+
+def parse_batch(records, checksum=True, frozen=False):
+    # Parses an iterable of hex strings or binary EDIDs and returns (results, errors). results holds one parse()
+    # dict per record (read-only freeze() copies if frozen), None for rejected records; errors is a list of BatchError.
+    results = []
+    errors = []
+    for index, record in enumerate(records):
+        result, error = parse_record(record, checksum, frozen)
+        results.append(result)
+        if error is not None:
+            errors.append(BatchError(index, *error))
+    return results, errors
+
+
+def parse_dedup(records, checksum=True, frozen=False):
+    # parse_batch() for corpora with many exact duplicates: records are keyed by their binary content, every unique
+    # EDID is validated and parsed once and its result is shared by all of its positions (do not mutate results,
+    # or pass frozen=True to get read-only ones). Returns (results, errors, stats)
+    results = []
+    errors = []
+    seen = {}
+    for index, record in enumerate(records):
+        raw, error = decode(record)
+        if error is None:
+            key = raw if isinstance(raw, bytes) else bytes(raw)
+            cached = seen.get(key)
+            if cached is None:
+                cached = seen[key] = parse_record(key, checksum, frozen)
+            result, error = cached
+        else:
+            result = None
+        results.append(result)
+        if error is not None:
+            errors.append(BatchError(index, *error))
+    total = len(results)
+    unique = len(seen)
+    return results, errors, DedupStats(total, unique, 1 - unique / total if total else 0.0)
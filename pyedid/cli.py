@@ -0,0 +1,123 @@
+# Command-line interface.
+#
+#   python -m pyedid 00ffffffffffff00... /sys/class/drm/*/edid dumps/ - > edids.jsonl
+#
+# Inputs are hex strings, files, directories (walked recursively) or "-" for stdin (the default). A file or stdin
+# starting with the EDID header is one binary EDID, otherwise every non-empty line is a hex record. gzip, bz2 and xz
+# input is decompressed on the fly. Every record gives one JSON line on stdout, in input order, also when parsing with
+# several worker processes.
+
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import pyedid
+from pyedid.batch import parse_record
+from pyedid.streams import INPUT_ERRORS, open_input, read_file, read_records
+
+# Records handed to a worker at once
+CHUNK = 64
+
+
+def collect(inputs):
+    # (source, record) pairs of all inputs in command line order
+    for index, value in enumerate(inputs):
+        if value == "-":
+            for item in read_records(open_input(sys.stdin.buffer), "<stdin>"):
+                yield item
+        elif os.path.isdir(value):
+            for directory, dirnames, filenames in os.walk(value):
+                dirnames.sort()
+                for name in sorted(filenames):
+                    for item in read_file(os.path.join(directory, name)):
+                        yield item
+        elif os.path.exists(value):
+            for item in read_file(value):
+                yield item
+        else:
+            yield "<arg %d>" % (index + 1), value
+
+
+def parse_item(item, checksum=True):
+    source, record = item
+    data, error = parse_record(record, checksum)
+    return source, data, error
+
+
+def parse_item_nocheck(item):
+    return parse_item(item, False)
+
+
+def parse_items(items, jobs, checksum):
+    # (source, data, error) triples in input order
+    function = parse_item if checksum else parse_item_nocheck
+    if jobs == 1:
+        for item in items:
+            yield function(item)
+        return
+    with multiprocessing.Pool(jobs) as pool:
+        for result in pool.imap(function, items, CHUNK):
+            yield result
+
+
+def parse_fields(value):
+    return [field for field in value.split(",") if field]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyedid", description="Parse EDIDs to JSON Lines")
+    parser.add_argument("inputs", nargs="*", default=["-"],
+                        help="hex strings, binary or hex files, directories or - for stdin (default)")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="parser worker processes, 0 for one per CPU (default: %(default)s)")
+    parser.add_argument("-f", "--fields", type=parse_fields,
+                        help="comma separated parse() fields to output (default: all)")
+    parser.add_argument("--fail-fast", action="store_true",
+                        help="stop at the first invalid EDID instead of writing an error line for it")
+    parser.add_argument("--no-checksum", dest="checksum", action="store_false",
+                        help="accept blocks with bad checksums")
+    parser.add_argument("--stats", action="store_true", help="print throughput statistics to stderr")
+    parser.add_argument("--version", action="version", version="%(prog)s " + pyedid.__version__)
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+
+    out = sys.stdout
+    records = 0
+    errors = 0
+    start = time.perf_counter()
+    try:
+        for source, data, error in parse_items(collect(args.inputs), jobs, args.checksum):
+            records += 1
+            if error is not None:
+                errors += 1
+                reason, offset = error
+                if args.fail_fast:
+                    sys.stderr.write("pyedid: %s: %s at offset %s\n" % (source, reason, offset))
+                    break
+                line = {"source": source, "error": reason, "offset": offset}
+            elif args.fields:
+                line = {"source": source}
+                for field in args.fields:
+                    line[field] = data.get(field)
+            else:
+                line = {"source": source}
+                line.update(data)
+            out.write(json.dumps(line))
+            out.write("\n")
+    except BrokenPipeError:
+        # Output closed early, e.g. piped into head
+        sys.stderr.close()
+        return 1
+    except INPUT_ERRORS as e:
+        sys.stderr.write("pyedid: %s\n" % e)
+        return 1
+
+    if args.stats:
+        elapsed = time.perf_counter() - start
+        sys.stderr.write("%d records, %d errors in %.3f s (%.0f records/s, %d jobs)\n"
+                         % (records, errors, elapsed, records / elapsed if elapsed else 0, jobs))
+    return 1 if errors else 0
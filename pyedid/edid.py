@@ -3,30 +3,158 @@
 # VESA DMT https://glenwing.github.io/docs/VESA-DMT-1.13.pdf
 
 
-import re
+import math
+from types import MappingProxyType
 from pyedid.pnp_id_list import registry
 
 
+HEADER = b"\x00\xff\xff\xff\xff\xff\xff\x00"
+
+# Offsets of the four 18-byte Detailed Timing Descriptor / Monitor Descriptor slots
+DESCRIPTOR_OFFSETS = (0x36, 0x48, 0x5a, 0x6c)
+
+# Established Timings, bits 0-7 of 0x23, bits 0-7 of 0x24 and bit 7 of 0x25 (manufacturer's timings)
+ESTABLISHED_TIMINGS = (
+    "800x600 @ 60Hz",
+    "800x600 @ 56Hz",
+    "640x480 @ 75Hz",
+    "640x480 @ 72Hz",
+    "640x480 @ 67Hz",
+    "640x480 @ 60Hz",
+    "720x400 @ 88Hz",
+    "720x400 @ 70Hz",
+    "1280x1024 @ 75Hz",
+    "1024x768 @ 75Hz",
+    "1024x768 @ 70Hz",
+    "1024x768 @ 60Hz",
+    "1024x768i @ 87Hz",
+    "832x624 @ 75Hz",
+    "800x600 @ 75Hz",
+    "800x600 @ 72Hz",
+    "1152 x 870 @ 75Hz",
+)
+
+# ESTABLISHED_TIMINGS as (h_active, v_active, refresh, interlaced) modes
+ESTABLISHED_MODES = (
+    (800, 600, 60, False),
+    (800, 600, 56, False),
+    (640, 480, 75, False),
+    (640, 480, 72, False),
+    (640, 480, 67, False),
+    (640, 480, 60, False),
+    (720, 400, 88, False),
+    (720, 400, 70, False),
+    (1280, 1024, 75, False),
+    (1024, 768, 75, False),
+    (1024, 768, 70, False),
+    (1024, 768, 60, False),
+    (1024, 768, 87, True),
+    (832, 624, 75, False),
+    (800, 600, 75, False),
+    (800, 600, 72, False),
+    (1152, 870, 75, False),
+)
+
+# 64-bit FNV-1a parameters used by fingerprint()
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+
+
 def hex2int(hex_str):
     return int("0x" + hex_str, 16)
 
 
+def descriptor_text(raw, offset):
+    # Monitor descriptor payload, up to 13 chars terminated by 0x0a
+    text = bytes(raw[offset + 5:offset + 18])
+    for end, char in enumerate(text):
+        if char == 0x0a or char == 0x00:
+            return text[:end]
+    return text
+
+
+def serial_descriptor(raw):
+    # Text of the first Monitor serial number descriptor (tag 0xff), b"" if there is none
+    for i in DESCRIPTOR_OFFSETS:
+        if raw[i + 3] == 0xff and not (raw[i] or raw[i + 1] or raw[i + 2] or raw[i + 4]):
+            return descriptor_text(raw, i)
+    return b""
+
+
+def fingerprint(raw):
+    # Stable 64-bit display identity computed straight from a binary EDID: FNV-1a over the manufacturer code,
+    # product code and serial number (bytes 0x08-0x0f) followed by the serial string descriptor zero-padded to 13 bytes
+    value = FNV_OFFSET
+    for byte in bytes(raw[8:16]) + serial_descriptor(raw).ljust(13, b"\x00"):
+        value = ((value ^ byte) * FNV_PRIME) & 0xffffffffffffffff
+    return value
+
+
+def freeze(value):
+    # Deeply immutable copy of a parse() result: dicts become read-only MappingProxyType views over private copies,
+    # lists become tuples. Safe to share between threads and cache layers without locks or defensive copies. Use
+    # thaw() to get plain dicts back, e.g. for json or pickle
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
 class InvalidEdidException(Exception):
     pass
 
 
 class EDID:
     def __init__(self, hex):
-        hex = re.sub(r"\s+", "", hex)
+        # Accepts a hex string (whitespace is ignored) or a binary EDID as bytes, bytearray or memoryview. Binary
+        # input is not copied. Either way the hex pairs in self.bytes are only built when parse() needs them, so
+        # identify() and fingerprint() never pay for them
         self.data = {}
-        self.bytes = []
-        for i in range(0, int(len(hex) / 2)):
-            self.bytes.append(hex[i*2:i*2+2])
+        self._mode_index = None
+        self._bytes = None
+        if isinstance(hex, (bytes, bytearray, memoryview)):
+            self._raw = hex
+            self._hex = None
+            return
+        self._raw = None
+        self._hex = "".join(hex.split())
+
+    @property
+    def bytes(self):
+        if self._bytes is None:
+            hex = self._hex if self._raw is None else self._raw.hex()
+            self._bytes = [hex[i:i + 2] for i in range(0, len(hex) - 1, 2)]
+        return self._bytes
+
+    @bytes.setter
+    def bytes(self, pairs):
+        # Replaces the EDID with a list of hex pairs, raw and the supports() index are rebuilt from it when needed
+        self._bytes = pairs
+        self._hex = "".join(pairs)
+        self._raw = None
+        self._mode_index = None
+
+    @property
+    def raw(self):
+        # Binary EDID, decoded once from the hex string (a trailing odd digit is ignored) and cached
+        if self._raw is None:
+            self._raw = bytes.fromhex(self._hex[:len(self._hex) // 2 * 2])
+        return self._raw
 
     def hex(self, num, count=1, reverse=False):
         hex_arr = []
+        pairs = self.bytes
         for i in range(num, num + count):
-            hex_arr.append(self.bytes[i])
+            hex_arr.append(pairs[i])
         return "".join(hex_arr if not reverse else list(reversed(hex_arr)))
 
     def byte(self, num, count=1, reverse=False):
@@ -54,7 +182,72 @@ class EDID:
             dict_ret.update(additional)
         return dict_ret
 
-    def parse(self):
+    def identify(self):
+        # Header-only identification: manufacturer, product, serial, date of manufacture and the monitor name /
+        # serial string descriptors. Timings, colors and features are never decoded.
+        raw = self.raw
+        if len(raw) < 128 or raw[0:8] != HEADER:
+            raise InvalidEdidException("Invalid EDID format")
+
+        # ID Manufacturer Name, EISA 3-character ID
+        byte = raw[8] << 8 | raw[9]
+        manufacturer_id = "".join((chr((byte >> 10 & 0b11111) + 64),
+                                   chr((byte >> 5 & 0b11111) + 64),
+                                   chr((byte & 0b11111) + 64)))
+
+        identity = {
+            "manufacturer_id": manufacturer_id,
+            "manufacturer_name": registry.get(manufacturer_id),
+            "product_code": raw[0x0a] | raw[0x0b] << 8,
+            "serial_number": raw[0x0c] | raw[0x0d] << 8 | raw[0x0e] << 16 | raw[0x0f] << 24,
+            "week_of_manufacture": raw[0x10],
+            "year_of_manufacture": raw[0x11] + 1990,
+            "monitor_name": None,
+            "monitor_serial": None,
+        }
+
+        # Monitor descriptors: 3 zero bytes, tag, zero reserved byte, then up to 13 chars terminated by 0x0a
+        for i in DESCRIPTOR_OFFSETS:
+            tag = raw[i + 3]
+            if (tag == 0xfc or tag == 0xff) and not (raw[i] or raw[i + 1] or raw[i + 2] or raw[i + 4]):
+                key = "monitor_name" if tag == 0xfc else "monitor_serial"
+                if identity[key] is None:
+                    identity[key] = descriptor_text(raw, i).decode("latin-1")
+
+        return identity
+
+    def fingerprint(self):
+        # See fingerprint(), independent of parse() and of the textual representation of the input
+        raw = self.raw
+        if len(raw) < 128 or raw[0:8] != HEADER:
+            raise InvalidEdidException("Invalid EDID format")
+        return fingerprint(raw)
+
+    def supports(self, h_active, v_active, refresh, interlaced=False, tolerance=0, range_limits=False):
+        # O(1) lookup in a hash index of the detailed, standard, established and CEA-861 extension modes, built on
+        # the first call. Interlaced modes are given by frame height and field rate, e.g. 1920, 1080, 60, True.
+        # tolerance: accepted refresh deviation in Hz, e.g. 0.5 to match 59.94 against 60
+        # range_limits: also accept undeclared modes that fit the Display Range Limits, if the display announces
+        # formula-derived timings (see modes.formula_limits())
+        from pyedid import modes  # pyedid.modes imports this module
+
+        if self._mode_index is None:
+            self._mode_index = modes.mode_index(self.raw)
+        interlaced = bool(interlaced)
+        if (h_active, v_active, refresh, interlaced) in self._mode_index:
+            return True
+        if tolerance:
+            for rate in range(math.ceil(refresh - tolerance), math.floor(refresh + tolerance) + 1):
+                if (h_active, v_active, rate, interlaced) in self._mode_index:
+                    return True
+
+        if range_limits:
+            limits = modes.formula_limits(self.raw)
+            return limits is not None and modes.within_limits((h_active, v_active, refresh, interlaced), limits)
+        return False
+
+    def parse(self, frozen=False):
+        # Fills and returns self.data, or a freeze() copy of it when frozen is True
         # EDID Format fixed header pattern
         if self.hex(0, 8).lower() != "00ffffffffffff00":
             raise InvalidEdidException("Invalid EDID format")
@@ -229,39 +422,8 @@ class EDID:
         # self.data["established_timings1_bin"] = timings1 = self.byte(0x23)
         # self.data["established_timings2_bin"] = timings2 = self.byte(0x24)
         # self.data["manufacturers_timings_bin"] = timings3 = self.byte(0x25)
-        timings1 = self.byte(0x23)
-        timings2 = self.byte(0x24)
-        timings3 = self.byte(0x25)
-        timings = []
-
-        for shift, timing in enumerate([
-            "800x600 @ 60Hz",
-            "800x600 @ 56Hz",
-            "640x480 @ 75Hz",
-            "640x480 @ 72Hz",
-            "640x480 @ 67Hz",
-            "640x480 @ 60Hz",
-            "720x400 @ 88Hz",
-            "720x400 @ 70Hz",
-        ]):
-            if timings1 >> shift & 1:
-                timings.append(timing)
-
-        for shift, timing in enumerate([
-            "1280x1024 @ 75Hz",
-            "1024x768 @ 75Hz",
-            "1024x768 @ 70Hz",
-            "1024x768 @ 60Hz",
-            "1024x768i @ 87Hz",
-            "832x624 @ 75Hz",
-            "800x600 @ 75Hz",
-            "800x600 @ 72Hz",
-        ]):
-            if timings2 >> shift & 1:
-                timings.append(timing)
-
-        if timings3 >> 7 & 1:
-            timings.append("1152 x 870 @ 75Hz")
+        bits = self.byte(0x23) | self.byte(0x24) << 8 | (self.byte(0x25) >> 7 & 1) << 16
+        timings = [timing for shift, timing in enumerate(ESTABLISHED_TIMINGS) if bits >> shift & 1]
 
         self.data["established_timings"] = timings
 
@@ -534,4 +696,6 @@ class EDID:
         self.data["descriptors"] = descriptors
         self.data["timings"] = timings + self.data["standard_timings"] + self.data["established_timings"]
 
+        if frozen:
+            return freeze(self.data)
         return self.data
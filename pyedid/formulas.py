@@ -0,0 +1,220 @@
+# Formula-derived timings for displays whose Display Range Limits descriptor announces GTF or CVT support.
+#
+# The calculators take array_like (h_active, v_active, refresh, interlaced) candidates and compute the full timing of
+# every candidate at once. As everywhere in pyedid, interlaced modes are given by frame height and field rate.
+# Requires numpy.
+#
+# VESA GTF https://glenwing.github.io/docs/VESA-GTF-1.1.pdf
+# VESA CVT https://glenwing.github.io/docs/VESA-CVT-1.2.pdf
+
+
+from pyedid.arrays import np, require_numpy, as_array, to_records
+
+# Same fields as TIMING_DTYPE where they overlap, h_rate in kHz and refresh is the actual field rate in Hz
+FORMULA_DTYPE = [
+    ("h_active", "u2"),
+    ("v_active", "u2"),
+    ("refresh", "f8"),
+    ("interlaced", "?"),
+    ("pixel_clock", "u8"),
+    ("h_rate", "f8"),
+    ("h_blanking", "u2"),
+    ("h_front_porch", "u2"),
+    ("h_pulse_width", "u2"),
+    ("v_blanking", "u2"),
+    ("v_front_porch", "u2"),
+    ("v_pulse_width", "u2"),
+]
+
+# Range limits extended timing information types
+DEFAULT_GTF = 0x00
+SECONDARY_GTF = 0x02
+CVT = 0x04
+
+# Default GTF parameters, C' = (C - J) * K / 256 + J and M' = K / 256 * M
+GTF_C = 40
+GTF_M = 600
+GTF_K = 128
+GTF_J = 20
+GTF_C_PRIME = (GTF_C - GTF_J) * GTF_K / 256 + GTF_J
+GTF_M_PRIME = GTF_K / 256 * GTF_M
+
+CELL_GRAN = 8
+MIN_V_PORCH = 3
+MIN_V_BPORCH = 6
+MIN_VSYNC_BP = 550  # us
+RB_MIN_V_BLANK = 460  # us
+
+
+def candidates(h_active, v_active, refresh, interlaced=False):
+    h_active, v_active, refresh, interlaced = np.broadcast_arrays(
+        np.asarray(h_active, dtype=np.float64), np.asarray(v_active, dtype=np.float64),
+        np.asarray(refresh, dtype=np.float64), np.asarray(interlaced, dtype=bool))
+    timings = np.zeros(h_active.shape, dtype=FORMULA_DTYPE)
+    timings["h_active"] = h_active
+    timings["v_active"] = v_active
+    timings["interlaced"] = interlaced
+    # Active lines per field and the extra half line of interlaced fields
+    lines = np.where(interlaced, np.floor(v_active / 2), v_active)
+    half = np.where(interlaced, 0.5, 0.0)
+    return timings, h_active, refresh, lines, half
+
+
+def vsync_width(h_active, v_active):
+    # CVT vertical sync width encodes the aspect ratio
+    ratio = h_active / np.maximum(v_active, 1)
+    width = np.full(ratio.shape, 10)
+    for aspect, lines in ((4 / 3, 4), (16 / 9, 5), (16 / 10, 6), (5 / 4, 7), (15 / 9, 7)):
+        width = np.where(np.isclose(ratio, aspect, atol=0.01) & (width == 10), lines, width)
+    return width
+
+
+def finish(timings, h_total, v_total, pixel_clock):
+    # pixel_clock in MHz
+    h_rate = pixel_clock * 1000 / h_total
+    timings["pixel_clock"] = np.rint(pixel_clock * 1e6)
+    timings["h_rate"] = h_rate
+    timings["refresh"] = h_rate * 1000 / v_total
+    return timings
+
+
+def gtf(h_active, v_active, refresh, interlaced=False, c=GTF_C, m=GTF_M, k=GTF_K, j=GTF_J):
+    # GTF timings, by default with the default parameters (C = 40, M = 600, K = 128, J = 20), no margins. The
+    # parameters only change the blanking, not the horizontal and vertical rates
+    require_numpy()
+    c_prime = (c - j) * k / 256 + j
+    m_prime = k / 256 * m
+    timings, h_active, refresh, lines, half = candidates(h_active, v_active, refresh, interlaced)
+    h_pixels = np.rint(h_active / CELL_GRAN) * CELL_GRAN
+
+    h_period_est = (1e6 / refresh - MIN_VSYNC_BP) / (lines + 1 + half)
+    vsync_bp = np.rint(MIN_VSYNC_BP / h_period_est)
+    v_total = lines + vsync_bp + 1 + half
+    h_period = h_period_est * (1e6 / (h_period_est * v_total)) / refresh
+
+    duty_cycle = c_prime - m_prime * h_period / 1000
+    h_blanking = np.rint(h_pixels * duty_cycle / (100 - duty_cycle) / (2 * CELL_GRAN)) * 2 * CELL_GRAN
+    h_total = h_pixels + h_blanking
+    h_sync = np.rint(0.08 * h_total / CELL_GRAN) * CELL_GRAN
+
+    timings["h_blanking"] = h_blanking
+    timings["h_pulse_width"] = h_sync
+    timings["h_front_porch"] = h_blanking / 2 - h_sync
+    timings["v_blanking"] = vsync_bp + 1
+    timings["v_front_porch"] = 1
+    timings["v_pulse_width"] = 3
+    return finish(timings, h_total, v_total, h_total / h_period)
+
+
+def cvt(h_active, v_active, refresh, interlaced=False, reduced_blanking=0):
+    # CVT 1.2 timings, reduced_blanking: 0 for CRT timings, 1 or 2 for the reduced blanking timing versions.
+    # Reduced blanking v2 has no interlaced variant, the interlaced flag is ignored there
+    require_numpy()
+    if reduced_blanking == 2:
+        interlaced = False
+    timings, h_active, refresh, lines, half = candidates(h_active, v_active, refresh, interlaced)
+    v_active = timings["v_active"].astype(np.float64)
+
+    if reduced_blanking == 2:
+        h_pixels = h_active
+        h_period_est = (1e6 / refresh - RB_MIN_V_BLANK) / lines
+        vbi = np.maximum(np.floor(RB_MIN_V_BLANK / h_period_est) + 1, 1 + 8 + MIN_V_BPORCH)
+        h_blanking = np.full(h_pixels.shape, 80.0)
+        v_total = lines + vbi
+        h_total = h_pixels + h_blanking
+        # 1 kHz clock steps
+        pixel_clock = np.floor(refresh * v_total * h_total / 1e6 / 0.001) * 0.001
+        timings["h_front_porch"] = 8
+        timings["h_pulse_width"] = 32
+        timings["v_front_porch"] = vbi - 8 - MIN_V_BPORCH
+        timings["v_pulse_width"] = 8
+        timings["v_blanking"] = vbi
+    elif reduced_blanking == 1:
+        h_pixels = np.floor(h_active / CELL_GRAN) * CELL_GRAN
+        v_sync = vsync_width(h_pixels, v_active)
+        h_period_est = (1e6 / refresh - RB_MIN_V_BLANK) / lines
+        vbi = np.maximum(np.floor(RB_MIN_V_BLANK / h_period_est) + 1, MIN_V_PORCH + v_sync + MIN_V_BPORCH)
+        h_blanking = np.full(h_pixels.shape, 160.0)
+        v_total = lines + vbi + half
+        h_total = h_pixels + h_blanking
+        # 0.25 MHz clock steps
+        pixel_clock = np.floor(refresh * v_total * h_total / 1e6 / 0.25) * 0.25
+        timings["h_front_porch"] = 48
+        timings["h_pulse_width"] = 32
+        timings["v_front_porch"] = MIN_V_PORCH
+        timings["v_pulse_width"] = v_sync
+        timings["v_blanking"] = vbi
+    else:
+        h_pixels = np.floor(h_active / CELL_GRAN) * CELL_GRAN
+        v_sync = vsync_width(h_pixels, v_active)
+        h_period_est = (1e6 / refresh - MIN_VSYNC_BP) / (lines + MIN_V_PORCH + half)
+        vsync_bp = np.maximum(np.floor(MIN_VSYNC_BP / h_period_est) + 1, v_sync + MIN_V_BPORCH)
+        v_total = lines + vsync_bp + half + MIN_V_PORCH
+        duty_cycle = np.maximum(GTF_C_PRIME - GTF_M_PRIME * h_period_est / 1000, 20)
+        h_blanking = np.floor(h_pixels * duty_cycle / (100 - duty_cycle) / (2 * CELL_GRAN)) * 2 * CELL_GRAN
+        h_total = h_pixels + h_blanking
+        pixel_clock = np.floor(h_total / h_period_est / 0.25) * 0.25
+        h_sync = np.floor(0.08 * h_total / CELL_GRAN) * CELL_GRAN
+        timings["h_pulse_width"] = h_sync
+        timings["h_front_porch"] = h_blanking / 2 - h_sync
+        timings["v_front_porch"] = MIN_V_PORCH
+        timings["v_pulse_width"] = v_sync
+        timings["v_blanking"] = vsync_bp + MIN_V_PORCH
+
+    timings["h_active"] = h_pixels
+    timings["h_blanking"] = h_blanking
+    return finish(timings, h_total, v_total, pixel_clock)
+
+
+def fits(timings, records, max_pixel_clock=None):
+    # (N, M) boolean matrix: formula timing m is within the range limits of EDID record n (see to_records()).
+    # max_pixel_clock (kHz per record) overrides the records' max_pixel_clock
+    timings = np.ravel(timings)
+    if max_pixel_clock is None:
+        max_pixel_clock = records["max_pixel_clock"]
+    records = records[:, np.newaxis]
+    v_rate = np.rint(timings["refresh"])
+    h_rate = np.rint(timings["h_rate"])
+    max_pixel_clock = np.asarray(max_pixel_clock, dtype=np.uint64)[:, np.newaxis] * 1000
+    return (records["has_range_limits"]
+            & (records["min_v_rate"] <= v_rate) & (v_rate <= records["max_v_rate"])
+            & (records["min_h_rate"] <= h_rate) & (h_rate <= records["max_h_rate"])
+            & ((max_pixel_clock == 0) | (timings["pixel_clock"] <= max_pixel_clock)))
+
+
+def formula_modes(edids, h_active, v_active, refresh, interlaced=False):
+    # (N, M) boolean matrix telling which of the M candidate modes every EDID supports through its range limits:
+    # GTF for "Default GTF", GTF switching to the announced secondary curve from its start break frequency on for
+    # "Secondary GTF", and CVT and / or CVT reduced blanking v1 as announced for "CVT", within the CVT pixel clock and
+    # active pixel limits. Candidate timings are computed once per formula (and secondary curve) and shared by the
+    # whole fleet. Accepts anything to_records() accepts or a to_records() array
+    require_numpy()
+    if isinstance(edids, np.ndarray) and edids.dtype.names:
+        records = edids
+    else:
+        records = to_records(as_array(edids))
+    extended_type = records["extended_type"][:, np.newaxis]
+
+    timings = gtf(h_active, v_active, refresh, interlaced)
+    gtf_fits = fits(timings, records)
+    h_rate = np.rint(np.ravel(timings)["h_rate"])
+    # Fleets share a handful of secondary curves, the timings of every distinct one are computed once
+    secondary = records["extended_type"] == SECONDARY_GTF
+    curves = np.stack([records[name] for name in ("gtf_c", "gtf_m", "gtf_k", "gtf_j")], axis=1).astype(np.float64)
+    for curve in np.unique(curves[secondary], axis=0):
+        rows = np.flatnonzero(secondary & (curves == curve).all(axis=1))
+        secondary_fits = fits(gtf(h_active, v_active, refresh, interlaced, *curve), records[rows])
+        above = h_rate >= records["gtf_start_break"][rows, np.newaxis]
+        gtf_fits[rows] = np.where(above, secondary_fits, gtf_fits[rows])
+
+    # CVT limits the pixel clock in 0.25 MHz steps and may limit the active pixels per line
+    max_pixel_clock = (records["max_pixel_clock"].astype(np.int64) - records["cvt_clock_reduction"]).clip(0)
+    standard = cvt(h_active, v_active, refresh, interlaced)
+    reduced = cvt(h_active, v_active, refresh, interlaced, reduced_blanking=1)
+    max_h_active = records["cvt_max_h_active"][:, np.newaxis]
+    cvt_fits = ((records["cvt_standard_blanking"][:, np.newaxis] & fits(standard, records, max_pixel_clock)
+                 & ((max_h_active == 0) | (np.ravel(standard)["h_active"] <= max_h_active)))
+                | (records["cvt_reduced_blanking"][:, np.newaxis] & fits(reduced, records, max_pixel_clock)
+                   & ((max_h_active == 0) | (np.ravel(reduced)["h_active"] <= max_h_active))))
+    return (((extended_type == DEFAULT_GTF) | (extended_type == SECONDARY_GTF)) & gtf_fits
+            | (extended_type == CVT) & cvt_fits)
@@ -0,0 +1,333 @@
+# Supported video modes as interned (h_active, v_active, refresh, interlaced) tuples.
+#
+# Every distinct mode gets a small integer ID in a ModeTable, and the set of modes supported by an EDID is stored as
+# a bitset (a Python int with bit ID set for every supported mode). Union, intersection and membership across any
+# number of displays are then plain bitwise operations.
+
+
+import threading
+from pyedid.edid import EDID, DESCRIPTOR_OFFSETS, ESTABLISHED_MODES
+
+
+class ModeTable:
+    def __init__(self, modes=()):
+        self.ids = {}
+        self.modes = []
+        self.lock = threading.Lock()
+        for mode in modes:
+            self.intern(mode)
+
+    def __len__(self):
+        return len(self.modes)
+
+    def __getitem__(self, mode_id):
+        return self.modes[mode_id]
+
+    def __contains__(self, mode):
+        return mode in self.ids
+
+    def intern(self, mode):
+        # ID of `mode`, allocated on first sight. IDs never change once given out
+        mode_id = self.ids.get(mode)
+        if mode_id is None:
+            with self.lock:
+                mode_id = self.ids.get(mode)
+                if mode_id is None:
+                    mode_id = len(self.modes)
+                    self.modes.append(mode)
+                    self.ids[mode] = mode_id
+        return mode_id
+
+    def bitset(self, modes):
+        bits = 0
+        for mode in modes:
+            bits |= 1 << self.intern(mode)
+        return bits
+
+    def mode_ids(self, bits):
+        # Sorted IDs of the modes set in `bits`
+        ids = []
+        while bits:
+            lowest = bits & -bits
+            ids.append(lowest.bit_length() - 1)
+            bits ^= lowest
+        return ids
+
+    def decode(self, bits):
+        return [self.modes[mode_id] for mode_id in self.mode_ids(bits)]
+
+    def supports(self, bits, mode):
+        mode_id = self.ids.get(mode)
+        return mode_id is not None and bool(bits >> mode_id & 1)
+
+
+# CEA-861-F Video Identification Codes as modes, interlaced modes by frame height and field rate
+VIDEO_CODES = {
+    1: (640, 480, 60, False), 2: (720, 480, 60, False), 3: (720, 480, 60, False), 4: (1280, 720, 60, False),
+    5: (1920, 1080, 60, True), 6: (720, 480, 60, True), 7: (720, 480, 60, True), 8: (720, 240, 60, False),
+    9: (720, 240, 60, False), 10: (2880, 480, 60, True), 11: (2880, 480, 60, True), 12: (2880, 240, 60, False),
+    13: (2880, 240, 60, False), 14: (1440, 480, 60, False), 15: (1440, 480, 60, False), 16: (1920, 1080, 60, False),
+    17: (720, 576, 50, False), 18: (720, 576, 50, False), 19: (1280, 720, 50, False), 20: (1920, 1080, 50, True),
+    21: (720, 576, 50, True), 22: (720, 576, 50, True), 23: (720, 288, 50, False), 24: (720, 288, 50, False),
+    25: (2880, 576, 50, True), 26: (2880, 576, 50, True), 27: (2880, 288, 50, False), 28: (2880, 288, 50, False),
+    29: (1440, 576, 50, False), 30: (1440, 576, 50, False), 31: (1920, 1080, 50, False), 32: (1920, 1080, 24, False),
+    33: (1920, 1080, 25, False), 34: (1920, 1080, 30, False), 35: (2880, 480, 60, False), 36: (2880, 480, 60, False),
+    37: (2880, 576, 50, False), 38: (2880, 576, 50, False), 39: (1920, 1080, 50, True), 40: (1920, 1080, 100, True),
+    41: (1280, 720, 100, False), 42: (720, 576, 100, False), 43: (720, 576, 100, False), 44: (720, 576, 100, True),
+    45: (720, 576, 100, True), 46: (1920, 1080, 120, True), 47: (1280, 720, 120, False), 48: (720, 480, 120, False),
+    49: (720, 480, 120, False), 50: (720, 480, 120, True), 51: (720, 480, 120, True), 52: (720, 576, 200, False),
+    53: (720, 576, 200, False), 54: (720, 576, 200, True), 55: (720, 576, 200, True), 56: (720, 480, 240, False),
+    57: (720, 480, 240, False), 58: (720, 480, 240, True), 59: (720, 480, 240, True), 60: (1280, 720, 24, False),
+    61: (1280, 720, 25, False), 62: (1280, 720, 30, False), 63: (1920, 1080, 120, False),
+    64: (1920, 1080, 100, False), 65: (1280, 720, 24, False), 66: (1280, 720, 25, False), 67: (1280, 720, 30, False),
+    68: (1280, 720, 50, False), 69: (1280, 720, 60, False), 70: (1280, 720, 100, False), 71: (1280, 720, 120, False),
+    72: (1920, 1080, 24, False), 73: (1920, 1080, 25, False), 74: (1920, 1080, 30, False),
+    75: (1920, 1080, 50, False), 76: (1920, 1080, 60, False), 77: (1920, 1080, 100, False),
+    78: (1920, 1080, 120, False), 79: (1680, 720, 24, False), 80: (1680, 720, 25, False), 81: (1680, 720, 30, False),
+    82: (1680, 720, 50, False), 83: (1680, 720, 60, False), 84: (1680, 720, 100, False), 85: (1680, 720, 120, False),
+    86: (2560, 1080, 24, False), 87: (2560, 1080, 25, False), 88: (2560, 1080, 30, False),
+    89: (2560, 1080, 50, False), 90: (2560, 1080, 60, False), 91: (2560, 1080, 100, False),
+    92: (2560, 1080, 120, False), 93: (3840, 2160, 24, False), 94: (3840, 2160, 25, False),
+    95: (3840, 2160, 30, False), 96: (3840, 2160, 50, False), 97: (3840, 2160, 60, False),
+    98: (4096, 2160, 24, False), 99: (4096, 2160, 25, False), 100: (4096, 2160, 30, False),
+    101: (4096, 2160, 50, False), 102: (4096, 2160, 60, False), 103: (3840, 2160, 24, False),
+    104: (3840, 2160, 25, False), 105: (3840, 2160, 30, False), 106: (3840, 2160, 50, False),
+    107: (3840, 2160, 60, False),
+}
+
+# Process-wide table, established timings always hold IDs 0-16
+MODES = ModeTable(ESTABLISHED_MODES)
+
+
+def format_mode(mode):
+    # Same notation as parse()["timings"], e.g. "1920x1080 @ 60Hz"
+    h_active, v_active, refresh, interlaced = mode
+    return "%dx%d%s @ %dHz" % (h_active, v_active, "i" if interlaced else "", refresh)
+
+
+def detailed_mode(raw, i):
+    # Mode of the Detailed Timing Descriptor at offset i, None for monitor descriptors
+    pixel_clock = (raw[i] | raw[i + 1] << 8) * 10000
+    if not pixel_clock:
+        return None
+    h_active = raw[i + 2] | (raw[i + 4] >> 4 & 0x0f) << 8
+    h_blanking = raw[i + 3] | (raw[i + 4] & 0x0f) << 8
+    v_active = raw[i + 5] | (raw[i + 7] >> 4 & 0x0f) << 8
+    v_blanking = raw[i + 6] | (raw[i + 7] & 0x0f) << 8
+    total = (h_active + h_blanking) * (v_active + v_blanking)
+    if not total:
+        return None
+    return h_active, v_active, round(pixel_clock / total), bool(raw[i + 17] >> 7 & 1)
+
+
+def frame_mode(mode):
+    # Detailed timings describe interlaced modes by field, e.g. 1920x540i, switch to the frame height
+    return (mode[0], mode[1] * 2, mode[2], True) if mode[3] else mode
+
+
+def detailed_modes(raw):
+    # Interlaced modes by frame height, like the standard, established and extension modes
+    modes = []
+    for i in DESCRIPTOR_OFFSETS:
+        mode = detailed_mode(raw, i)
+        if mode is not None:
+            modes.append(frame_mode(mode))
+    return modes
+
+
+def standard_modes(raw):
+    # EDID structures prior to Version 1.3 defined aspect ratio 0b00 as 1:1 instead of 16:10
+    if (raw[0x12] == 1 and raw[0x13] >= 3) or raw[0x12] > 1:
+        ratios = ((16, 10), (4, 3), (5, 4), (16, 9))
+    else:
+        ratios = ((1, 1), (4, 3), (5, 4), (16, 9))
+    modes = []
+    for i in range(0x26, 0x36, 2):
+        if raw[i] == 0x01 and raw[i + 1] == 0x01:  # Unused field
+            continue
+        h_active = (raw[i] + 31) * 8
+        ratio = ratios[raw[i + 1] >> 6 & 0b11]
+        modes.append((h_active, int(h_active / ratio[0] * ratio[1]), (raw[i + 1] & 0b111111) + 60, False))
+    return modes
+
+
+def established_modes(raw):
+    bits = raw[0x23] | raw[0x24] << 8 | (raw[0x25] >> 7 & 1) << 16
+    return [mode for shift, mode in enumerate(ESTABLISHED_MODES) if bits >> shift & 1]
+
+
+def edid_modes(edid):
+    # Supported modes of an EDID object or binary EDID, in parse()["timings"] order: detailed, standard, established
+    raw = edid.raw if isinstance(edid, EDID) else edid
+    return detailed_modes(raw) + standard_modes(raw) + established_modes(raw)
+
+
+def extension_modes(raw):
+    # Short Video Descriptors and Detailed Timing Descriptors of the CEA-861 extension blocks, interlaced modes by
+    # frame height
+    modes = []
+    for start in range(128, min(len(raw), (1 + raw[0x7e]) * 128) - 127, 128):
+        if raw[start] != 0x02:
+            continue
+        dtd_offset = raw[start + 2]
+        # Data block collection from byte 4 up to the first DTD
+        i = start + 4
+        end = start + dtd_offset if dtd_offset >= 4 else i
+        while i < end:
+            tag = raw[i] >> 5
+            length = raw[i] & 0b11111
+            if tag == 0x02:  # Video Data Block
+                for svd in raw[i + 1:min(i + 1 + length, end)]:
+                    # VICs 1-64 carry a native flag in bit 7, VICs 65 and up use all 8 bits
+                    vic = svd & 0x7f if 129 <= svd <= 192 else svd
+                    if vic in VIDEO_CODES:
+                        modes.append(VIDEO_CODES[vic])
+            i += 1 + length
+        if dtd_offset >= 4:
+            for i in range(start + dtd_offset, start + 110, 18):
+                mode = detailed_mode(raw, i)
+                if mode is None:
+                    break
+                modes.append(frame_mode(mode))
+    return modes
+
+
+def mode_index(raw):
+    # Hash index of every mode an EDID declares: detailed, standard and established timings of the base block plus
+    # the CEA-861 extension modes
+    return frozenset(edid_modes(raw) + extension_modes(raw))
+
+
+def mode_bitset(edid, table=MODES):
+    return table.bitset(edid_modes(edid))
+
+
+def common_modes(bitsets):
+    # Bitset of the modes supported by every display
+    common = None
+    for bits in bitsets:
+        common = bits if common is None else common & bits
+        if not common:
+            break
+    return common or 0
+
+
+def any_modes(bitsets):
+    # Bitset of the modes supported by at least one display
+    union = 0
+    for bits in bitsets:
+        union |= bits
+    return union
+
+
+def range_limits(raw):
+    # (min_v_rate Hz, max_v_rate Hz, min_h_rate kHz, max_h_rate kHz, max_pixel_clock kHz) of the Display Range Limits
+    # descriptor, None if there is none. Like parse(), the last descriptor wins
+    limits = None
+    for i in DESCRIPTOR_OFFSETS:
+        flags = raw[i + 4]
+        if raw[i] or raw[i + 1] or raw[i + 2] or raw[i + 3] != 0xfd or flags >> 4:
+            continue
+        h_offset = flags >> 2 & 0b11
+        v_offset = flags & 0b11
+        limits = (
+            raw[i + 5] + (0xff if v_offset == 0b11 else 0),
+            raw[i + 6] + (0xff if v_offset == 0b10 else 0),
+            raw[i + 7] + (0xff if h_offset == 0b11 else 0),
+            raw[i + 8] + (0xff if h_offset == 0b10 else 0),
+            raw[i + 9] * 10000,
+        )
+    return limits
+
+
+def formula_limits(raw):
+    # range_limits() of a display that announces formula-derived (GTF / CVT) timings, None otherwise: bit 0 of the
+    # feature byte (GTF supported, continuous frequency as of EDID 1.4) must be set and the range limits must carry
+    # timing information (extended timing type other than 0x01)
+    if not raw[0x18] & 1:
+        return None
+    extended_type = None
+    for i in DESCRIPTOR_OFFSETS:
+        if not (raw[i] or raw[i + 1] or raw[i + 2]) and raw[i + 3] == 0xfd and not raw[i + 4] >> 4:
+            extended_type = raw[i + 10]
+    if extended_type is None or extended_type == 0x01:
+        return None
+    return range_limits(raw)
+
+
+def mode_rates(mode):
+    # Lowest (h_rate kHz, pixel_clock kHz) a mode can be driven at, estimated with CVT reduced blanking:
+    # 160 pixels of horizontal blanking and at least 460 us of vertical blanking per field
+    h_active, v_active, refresh, interlaced = mode
+    lines = v_active / 2 if interlaced else v_active
+    h_rate = lines * refresh / (1 - 460e-6 * refresh) / 1000
+    return h_rate, h_rate * (h_active + 160)
+
+
+def within_limits(mode, limits, rates=None):
+    # `rates` is the (h_rate kHz, pixel_clock kHz) the mode would be driven at, estimated by mode_rates() if omitted
+    if limits is None:
+        return True
+    min_v_rate, max_v_rate, min_h_rate, max_h_rate, max_pixel_clock = limits
+    if not min_v_rate <= mode[2] <= max_v_rate:
+        return False
+    h_rate, pixel_clock = rates or mode_rates(mode)
+    return min_h_rate <= round(h_rate) <= max_h_rate and (not max_pixel_clock or pixel_clock <= max_pixel_clock)
+
+
+def mode_rank(mode):
+    # Highest resolution first, then progressive over interlaced, then highest refresh
+    return mode[0] * mode[1], not mode[3], mode[2]
+
+
+class Panel:
+    # Mode bitset (the modes of mode_index(), extension blocks included), range limits and exact detailed timing rates
+    # of one EDID, precomputed once and shared by every group it appears in
+    __slots__ = ("modes", "limits", "rates")
+
+    def __init__(self, edid, table=MODES):
+        raw = edid.raw if isinstance(edid, EDID) else edid
+        self.modes = table.bitset(edid_modes(raw) + extension_modes(raw))
+        self.limits = range_limits(raw)
+        self.rates = detailed_rates(raw)
+
+
+def detailed_rates(raw):
+    # {mode: (h_rate kHz, pixel_clock kHz)} of the detailed timings, keeping the lowest pixel clock per mode.
+    # Interlaced modes by frame height like detailed_modes()
+    rates = {}
+    for i in DESCRIPTOR_OFFSETS:
+        pixel_clock = (raw[i] | raw[i + 1] << 8) * 10
+        if not pixel_clock:
+            continue
+        h_active = raw[i + 2] | (raw[i + 4] >> 4 & 0x0f) << 8
+        h_total = h_active + (raw[i + 3] | (raw[i + 4] & 0x0f) << 8)
+        v_active = raw[i + 5] | (raw[i + 7] >> 4 & 0x0f) << 8
+        v_total = v_active + (raw[i + 6] | (raw[i + 7] & 0x0f) << 8)
+        if not h_total or not v_total:
+            continue
+        mode = frame_mode((h_active, v_active, round(pixel_clock * 1000 / (h_total * v_total)),
+                           bool(raw[i + 17] >> 7 & 1)))
+        if mode not in rates or pixel_clock < rates[mode][1]:
+            rates[mode] = (pixel_clock / h_total, pixel_clock)
+    return rates
+
+
+def best_common_mode(panels, table=MODES):
+    # Highest resolution / refresh supported by every panel of a group (e.g. a video wall) that also satisfies every
+    # panel's range limits, None if there is none. A mode listed as a detailed timing by any panel is checked with
+    # that exact timing, other modes with the mode_rates() estimate. Accepts Panel objects, EDID objects or binary
+    # EDIDs; reuse Panel objects when solving many groups
+    panels = [panel if isinstance(panel, Panel) else Panel(panel, table) for panel in panels]
+    if not panels:
+        return None
+    common = common_modes(panel.modes for panel in panels)
+    limits = {panel.limits for panel in panels if panel.limits is not None}
+    for mode in sorted(table.decode(common), key=mode_rank, reverse=True):
+        rates = None
+        for panel in panels:
+            if mode in panel.rates and (rates is None or panel.rates[mode][1] < rates[1]):
+                rates = panel.rates[mode]
+        if all(within_limits(mode, panel_limits, rates) for panel_limits in limits):
+            return mode
+    return None
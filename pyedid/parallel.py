@@ -0,0 +1,64 @@
+# Multiprocess decoding over shared memory. Requires numpy.
+#
+# The base blocks of all EDIDs are copied once into a multiprocessing.shared_memory block and every worker decodes a
+# disjoint row range straight into a second shared block holding the to_records() structured array. Only block
+# names and row ranges cross process boundaries, nothing is pickled per record.
+
+
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+from pyedid.arrays import np, require_numpy, as_array, to_records, RECORD_DTYPE
+
+# Rows per task handed to a worker
+DEFAULT_CHUNK = 65536
+
+# Per worker process state, see attach()
+shared = {}
+
+
+def attach(input_name, output_name, count):
+    # Workers share the parent's resource tracker, the parent alone unlinks the blocks
+    input_block = shared_memory.SharedMemory(name=input_name)
+    output_block = shared_memory.SharedMemory(name=output_name)
+    shared["blocks"] = (input_block, output_block)
+    shared["input"] = np.ndarray((count, 128), dtype=np.uint8, buffer=input_block.buf)
+    shared["output"] = np.ndarray(count, dtype=RECORD_DTYPE, buffer=output_block.buf)
+
+
+def decode_rows(bounds):
+    start, stop = bounds
+    shared["output"][start:stop] = to_records(shared["input"][start:stop])
+    return stop - start
+
+
+def parallel_records(edids, workers=None, chunk=DEFAULT_CHUNK):
+    # to_records() spread over `workers` processes (default: all CPUs) through shared memory
+    require_numpy()
+    array = as_array(edids)
+    count = len(array)
+    workers = workers or os.cpu_count() or 1
+    if count == 0 or workers == 1:
+        return to_records(array)
+
+    input_block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+    output_block = shared_memory.SharedMemory(create=True, size=count * np.dtype(RECORD_DTYPE).itemsize)
+    try:
+        np.ndarray(array.shape, dtype=np.uint8, buffer=input_block.buf)[:] = array
+        output = np.ndarray(count, dtype=RECORD_DTYPE, buffer=output_block.buf)
+
+        chunk = max(1, min(chunk, -(-count // workers)))
+        ranges = [(start, min(start + chunk, count)) for start in range(0, count, chunk)]
+        with multiprocessing.Pool(min(workers, len(ranges)), attach,
+                                  (input_block.name, output_block.name, count)) as pool:
+            for _ in pool.imap_unordered(decode_rows, ranges):
+                pass
+        records = output.copy()
+    finally:
+        # Views must be gone before the blocks can be closed
+        output = None
+        input_block.close()
+        input_block.unlink()
+        output_block.close()
+        output_block.unlink()
+    return records
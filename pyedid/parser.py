@@ -0,0 +1,153 @@
+# Reusable parser for tight loops over millions of EDIDs.
+#
+# EdidParser decodes the flat to_records() fields of one EDID after another into outputs owned by the caller: a dict
+# that is reused for every record, or a row of a preallocated RECORD_DTYPE array. Binary input is read in place, no
+# EDID object, hex pair list or result dict is created per record, and manufacturer IDs come from a lookup table
+# filled on first use. Hex strings cost one temporary bytes object each, feed binary EDIDs to avoid it.
+
+
+from pyedid.arrays import RECORD_DTYPE
+from pyedid.batch import validate
+from pyedid.edid import InvalidEdidException, DESCRIPTOR_OFFSETS, FNV_OFFSET, FNV_PRIME
+
+FIELDS = tuple(name for name, _ in RECORD_DTYPE)
+
+FNV_MASK = 0xffffffffffffffff
+
+# Range limit rate offset flags (bits 0-1 vertical, 2-3 horizontal) -> (min, max) rate offset, as parse() reads them
+RATE_OFFSETS = ((0, 0), (0, 0), (0, 0xff), (0xff, 0))
+
+
+class EdidParser:
+    fields = FIELDS
+
+    def __init__(self, checksum=True):
+        self.checksum = checksum
+        # 15-bit EISA code -> 3-character manufacturer ID
+        self.manufacturers = {}
+
+    def manufacturer_id(self, code):
+        value = self.manufacturers.get(code)
+        if value is None:
+            value = self.manufacturers[code] = "".join(
+                chr((code >> shift & 0b11111) + 64) for shift in (10, 5, 0))
+        return value
+
+    def fingerprint(self, raw):
+        # EDID.fingerprint() without intermediate bytes objects
+        value = FNV_OFFSET
+        for i in range(8, 16):
+            value = ((value ^ raw[i]) * FNV_PRIME) & FNV_MASK
+        text = 0
+        for i in DESCRIPTOR_OFFSETS:
+            if raw[i + 3] == 0xff and not (raw[i] or raw[i + 1] or raw[i + 2] or raw[i + 4]):
+                text = i + 5
+                break
+        terminated = not text
+        for i in range(13):
+            byte = 0
+            if not terminated:
+                byte = raw[text + i]
+                if byte == 0x0a or byte == 0x00:
+                    terminated = True
+                    byte = 0
+            value = ((value ^ byte) * FNV_PRIME) & FNV_MASK
+        return value
+
+    def parse_into(self, buf, out):
+        # Decodes a binary EDID (bytes, bytearray, memoryview) or hex string into `out`, which gets every field of
+        # FIELDS with the same value as the matching to_records() column. Returns out. Raises InvalidEdidException
+        # for records failing validation
+        raw = buf
+        if isinstance(buf, str):
+            try:
+                raw = bytes.fromhex(buf)
+            except ValueError:
+                raise InvalidEdidException("Invalid EDID format")
+        error = validate(raw, self.checksum)
+        if error is not None:
+            raise InvalidEdidException("Invalid EDID: %s at offset %s" % error)
+
+        out["fingerprint"] = self.fingerprint(raw)
+        out["manufacturer_id"] = self.manufacturer_id((raw[8] << 8 | raw[9]) & 0x7fff)
+        out["product_code"] = raw[0x0a] | raw[0x0b] << 8
+        out["serial_number"] = raw[0x0c] | raw[0x0d] << 8 | raw[0x0e] << 16 | raw[0x0f] << 24
+        out["week_of_manufacture"] = raw[0x10]
+        out["year_of_manufacture"] = raw[0x11] + 1990
+        out["edid_version"] = raw[0x12]
+        out["edid_revision"] = raw[0x13]
+        out["digital"] = raw[0x14] >> 7 == 1
+        out["h_size"] = raw[0x15]
+        out["v_size"] = raw[0x16]
+        out["gamma"] = raw[0x17]
+
+        feature = raw[0x18]
+        out["feature_standby"] = feature >> 7 & 1 == 1
+        out["feature_suspend"] = feature >> 6 & 1 == 1
+        out["feature_active_off"] = feature >> 5 & 1 == 1
+        out["display_type_bin"] = feature >> 3 & 0b11
+        out["feature_srgb"] = feature >> 2 & 1 == 1
+        out["feature_preferred_timing_mode"] = feature >> 1 & 1 == 1
+        out["feature_default_gtf"] = feature & 1 == 1
+        out["extensions"] = raw[0x7e]
+
+        # Preferred timing: the first detailed timing
+        pixel_clock = frame_rate = h_active = v_active = 0
+        interlaced = False
+        for i in DESCRIPTOR_OFFSETS:
+            if raw[i] or raw[i + 1]:
+                pixel_clock = (raw[i] | raw[i + 1] << 8) * 10000
+                h_active = raw[i + 2] | (raw[i + 4] >> 4) << 8
+                v_active = raw[i + 5] | (raw[i + 7] >> 4) << 8
+                total = (h_active + (raw[i + 3] | (raw[i + 4] & 0x0f) << 8)) * \
+                    (v_active + (raw[i + 6] | (raw[i + 7] & 0x0f) << 8))
+                frame_rate = round(pixel_clock / total) if total else 0
+                interlaced = raw[i + 17] >> 7 == 1
+                break
+        out["pixel_clock"] = pixel_clock
+        out["frame_rate"] = frame_rate
+        out["h_active"] = h_active
+        out["v_active"] = v_active
+        out["interlaced"] = interlaced
+
+        # Display range limits, the last descriptor wins as in parse()
+        limits = 0
+        for i in DESCRIPTOR_OFFSETS:
+            if not (raw[i] or raw[i + 1] or raw[i + 2]) and raw[i + 3] == 0xfd and raw[i + 4] >> 4 == 0:
+                limits = i
+        if limits:
+            i = limits
+            min_v, max_v = RATE_OFFSETS[raw[i + 4] & 0b11]
+            min_h, max_h = RATE_OFFSETS[raw[i + 4] >> 2 & 0b11]
+            out["has_range_limits"] = True
+            out["min_v_rate"] = raw[i + 5] + min_v
+            out["max_v_rate"] = raw[i + 6] + max_v
+            out["min_h_rate"] = raw[i + 7] + min_h
+            out["max_h_rate"] = raw[i + 8] + max_h
+            out["max_pixel_clock"] = raw[i + 9] * 10000
+            out["extended_type"] = extended_type = raw[i + 10]
+        else:
+            out["has_range_limits"] = False
+            out["min_v_rate"] = out["max_v_rate"] = out["min_h_rate"] = out["max_h_rate"] = 0
+            out["max_pixel_clock"] = 0
+            out["extended_type"] = extended_type = 0
+
+        # Extended timing information in bytes 11-17 of the range limits
+        if extended_type == 0x02:
+            out["gtf_start_break"] = raw[i + 12] * 2
+            out["gtf_c"] = raw[i + 13] / 2
+            out["gtf_m"] = raw[i + 14] | raw[i + 15] << 8
+            out["gtf_k"] = raw[i + 16]
+            out["gtf_j"] = raw[i + 17] / 2
+        else:
+            out["gtf_start_break"] = out["gtf_m"] = out["gtf_k"] = 0
+            out["gtf_c"] = out["gtf_j"] = 0.0
+        if extended_type == 0x04:
+            out["cvt_clock_reduction"] = (raw[i + 12] >> 2) * 250
+            out["cvt_max_h_active"] = ((raw[i + 12] & 0b11) << 8 | raw[i + 13]) * 8
+            out["cvt_standard_blanking"] = raw[i + 15] >> 4 & 1 == 1
+            out["cvt_reduced_blanking"] = raw[i + 15] >> 3 & 1 == 1
+        else:
+            out["cvt_clock_reduction"] = out["cvt_max_h_active"] = 0
+            out["cvt_standard_blanking"] = out["cvt_reduced_blanking"] = False
+        return out
@@ -0,0 +1,380 @@
+# Source -> parser pool -> sink pipelines with backpressure.
+#
+#   pipeline = Pipeline(jsonl_source("telemetry.jsonl", "display.edid"), SqliteSink("edids.db"), workers=8)
+#   pipeline.run()
+#
+# A reader thread pulls (source, record) pairs from the source in chunks, parser worker threads parse them (in
+# worker processes with processes=True) and the sink consumes the results in the calling thread. Stages are connected
+# by bounded queues: a slow sink fills the result queue, which blocks the parsers, which fill the chunk queue, which
+# blocks the reader, so memory stays bounded by the queue sizes. Results reach the sink in completion order, every
+# result carries its source label. metrics() can be polled from any thread while the pipeline runs.
+
+
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pyedid.aio import SYSFS_PATTERN
+from pyedid.arrays import np, require_numpy, RECORD_DTYPE
+from pyedid.batch import decode, parse_record, validate
+from pyedid.parser import EdidParser, FIELDS
+from pyedid.shards import INVALID_JSON, MISSING_FIELD, extract, output_line
+from pyedid.streams import open_input, read_file
+
+DEFAULT_CHUNK = 64
+DEFAULT_QUEUE_SIZE = 16
+
+# End of stream marker, one per parser worker
+DONE = None
+
+
+# Sources, iterables of (source, record) pairs. A (reason, offset) tuple in place of the record reports a record the
+# source could not extract
+
+def file_source(paths):
+    # Hex text (one record per line) or binary EDID files, plain or compressed
+    for path in paths:
+        for item in read_file(path):
+            yield item
+
+
+def sysfs_source(pattern=SYSFS_PATTERN):
+    # EDIDs of the connected displays, empty connector files are skipped
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "rb") as f:
+            raw = f.read()
+        if raw:
+            yield path, raw
+
+
+def jsonl_source(path, field="edid"):
+    # EDID hex strings at a dotted field path of every JSONL line, plain or compressed. Offsets are in the
+    # decompressed stream
+    with open_input(path) as f:
+        offset = 0
+        for line in f:
+            source = "%s@%d" % (path, offset)
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                value = extract(json.loads(line), field)
+            except ValueError:
+                yield source, (INVALID_JSON, None)
+                continue
+            yield source, value if isinstance(value, str) else (MISSING_FIELD, None)
+
+
+def archive_source(path):
+    # Blobs of a pyedid archive, copied out of the mapping. No slice of the mapping is alive across the yield, so
+    # closing the generator early (cancelled or failed pipeline) closes the archive cleanly
+    from pyedid.archive import Archive
+
+    with Archive(path) as archive:
+        for i in range(len(archive)):
+            with archive.blob(i) as blob:
+                raw = bytes(blob)
+            yield "%s[%d]" % (path, i), raw
+
+
+# Parser functions, [(source, record)] -> [(source, data, error)]. Module level so they run in worker processes too
+
+def parse_chunk(chunk, checksum=True):
+    # parse() dicts
+    results = []
+    for source, record in chunk:
+        if isinstance(record, tuple):
+            results.append((source, None, record))
+            continue
+        data, error = parse_record(record, checksum)
+        results.append((source, data, error))
+    return results
+
+
+# Records are validated before parse_into(), one parser per process keeps its lookup tables warm
+record_parser = EdidParser(checksum=False)
+
+
+def record_chunk(chunk, checksum=True):
+    # Flat EdidParser / to_records() fields
+    results = []
+    for source, record in chunk:
+        if isinstance(record, tuple):
+            results.append((source, None, record))
+            continue
+        raw, error = decode(record)
+        if error is None:
+            error = validate(raw, checksum)
+        if error is None:
+            results.append((source, record_parser.parse_into(raw, {}), None))
+        else:
+            results.append((source, None, error))
+    return results
+
+
+# Sinks: write() gets a list of (source, data, error) results, close() is called once at the end
+
+class JsonlSink:
+    parser = staticmethod(parse_chunk)
+
+    def __init__(self, output, fields=None):
+        # output is a path or a text file object
+        self.file = open(output, "w") if isinstance(output, str) else output
+        self.owned = isinstance(output, str)
+        self.fields = fields
+
+    def write(self, results):
+        write = self.file.write
+        for source, data, error in results:
+            write(json.dumps(output_line(source, data, error, self.fields)))
+            write("\n")
+
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
+
+
+class ArraySink:
+    # Collects valid records into a RECORD_DTYPE structured array (self.array after close()) and their sources
+    parser = staticmethod(record_chunk)
+
+    def __init__(self):
+        require_numpy()
+        self.chunks = []
+        self.sources = []
+        self.errors = []
+        self.array = None
+
+    def write(self, results):
+        rows = [(source, data) for source, data, error in results if error is None]
+        self.errors.extend((source, error) for source, data, error in results if error is not None)
+        array = np.zeros(len(rows), dtype=RECORD_DTYPE)
+        for name in FIELDS:
+            array[name] = [data[name] for _, data in rows]
+        self.chunks.append(array)
+        self.sources.extend(source for source, _ in rows)
+
+    def close(self):
+        self.array = np.concatenate(self.chunks) if self.chunks else np.zeros(0, dtype=RECORD_DTYPE)
+        self.chunks = []
+
+
+class SqliteSink:
+    # One row per record with the flat to_records() fields, fingerprint as 16 hex digits (it does not fit a signed
+    # SQLite integer), and the error reason of failed records
+    parser = staticmethod(record_chunk)
+
+    def __init__(self, path, table="edids"):
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        columns = ["source TEXT", "error TEXT"] + ["%s %s" % (name, "TEXT" if kind[0] == "U" or name == "fingerprint"
+                                                              else "REAL" if kind[0] == "f"
+                                                              else "INTEGER") for name, kind in RECORD_DTYPE]
+        self.connection.execute("CREATE TABLE IF NOT EXISTS %s (%s)" % (table, ", ".join(columns)))
+        self.insert = "INSERT INTO %s VALUES (%s)" % (table, ", ".join("?" * (len(FIELDS) + 2)))
+
+    def write(self, results):
+        rows = []
+        for source, data, error in results:
+            if error is not None:
+                rows.append((source, error[0]) + (None,) * len(FIELDS))
+                continue
+            row = [data[name] for name in FIELDS]
+            row[0] = "%016x" % row[0]
+            rows.append((source, None) + tuple(row))
+        with self.connection:
+            self.connection.executemany(self.insert, rows)
+
+    def close(self):
+        self.connection.close()
+
+
+class Stage:
+    # Counters of one pipeline stage and of the queue it feeds
+    def __init__(self, name, output=None):
+        self.name = name
+        self.output = output
+        self.lock = threading.Lock()
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        # Seconds spent blocked on a full output queue, i.e. backpressure from the next stage
+        self.blocked = 0.0
+        self.max_depth = 0
+        self.started = None
+        self.finished = None
+
+    def add(self, items, busy, errors=0):
+        with self.lock:
+            self.items += items
+            self.errors += errors
+            self.busy += busy
+
+    def snapshot(self):
+        with self.lock:
+            end = self.finished or time.perf_counter()
+            elapsed = end - self.started if self.started else 0.0
+            metrics = {
+                "items": self.items,
+                "errors": self.errors,
+                "items_per_s": self.items / elapsed if elapsed else 0.0,
+                "busy_s": self.busy,
+                "blocked_s": self.blocked,
+            }
+            if self.output is not None:
+                metrics["queue_depth"] = self.output.qsize()
+                metrics["queue_max_depth"] = self.max_depth
+                metrics["queue_capacity"] = self.output.maxsize
+        return metrics
+
+
+class Pipeline:
+    def __init__(self, source, sink, workers=None, chunk=DEFAULT_CHUNK, queue_size=DEFAULT_QUEUE_SIZE,
+                 checksum=True, processes=False):
+        # queue_size is in chunks. workers defaults to one per CPU; with processes=True every worker thread hands its
+        # chunks to a process pool, at most one chunk per worker in flight
+        self.source = source
+        self.sink = sink
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk = chunk
+        self.checksum = checksum
+        self.processes = processes
+        self.chunks = queue.Queue(queue_size)
+        self.results = queue.Queue(queue_size)
+        self.stages = {
+            "source": Stage("source", self.chunks),
+            "parse": Stage("parse", self.results),
+            "sink": Stage("sink"),
+        }
+        self.stop = threading.Event()
+        self.error = None
+
+    def metrics(self):
+        return {name: stage.snapshot() for name, stage in self.stages.items()}
+
+    def put(self, stage, queue_, item):
+        # Blocks while the queue is full, False once the pipeline is stopping
+        start = time.perf_counter()
+        try:
+            while not self.stop.is_set():
+                try:
+                    queue_.put(item, timeout=0.1)
+                except queue.Full:
+                    continue
+                depth = queue_.qsize()
+                with stage.lock:
+                    stage.max_depth = max(stage.max_depth, depth)
+                return True
+            return False
+        finally:
+            with stage.lock:
+                stage.blocked += time.perf_counter() - start
+
+    def get(self, queue_):
+        while not self.stop.is_set():
+            try:
+                return queue_.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        return DONE
+
+    def cancel(self):
+        # Stops a running pipeline from another thread, run() returns after the stages have wound down
+        self.stop.set()
+
+    def fail(self, error):
+        if self.error is None:
+            self.error = error
+        self.stop.set()
+
+    def read(self):
+        stage = self.stages["source"]
+        try:
+            chunk = []
+            start = time.perf_counter()
+            for item in self.source:
+                chunk.append(item)
+                if len(chunk) == self.chunk:
+                    stage.add(len(chunk), time.perf_counter() - start)
+                    if not self.put(stage, self.chunks, chunk):
+                        return
+                    chunk = []
+                    start = time.perf_counter()
+            if chunk:
+                stage.add(len(chunk), time.perf_counter() - start)
+                self.put(stage, self.chunks, chunk)
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            stage.finished = time.perf_counter()
+            for _ in range(self.workers):
+                self.put(stage, self.chunks, DONE)
+
+    def parse(self, executor):
+        stage = self.stages["parse"]
+        parser = self.sink.parser
+        try:
+            while True:
+                chunk = self.get(self.chunks)
+                if chunk is DONE:
+                    return
+                start = time.perf_counter()
+                if executor is None:
+                    results = parser(chunk, self.checksum)
+                else:
+                    results = executor.submit(parser, chunk, self.checksum).result()
+                errors = sum(1 for result in results if result[2] is not None)
+                stage.add(len(results), time.perf_counter() - start, errors)
+                if not self.put(stage, self.results, results):
+                    return
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            self.put(stage, self.results, DONE)
+
+    def run(self):
+        # Runs the pipeline to the end, closes the sink and returns metrics(). Re-raises the first error of any stage
+        executor = ProcessPoolExecutor(self.workers) if self.processes else None
+        now = time.perf_counter()
+        for stage in self.stages.values():
+            stage.started = now
+        threads = [threading.Thread(target=self.read, name="pyedid-source", daemon=True)]
+        threads += [threading.Thread(target=self.parse, args=(executor,), name="pyedid-parser-%d" % i, daemon=True)
+                    for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+
+        stage = self.stages["sink"]
+        try:
+            done = 0
+            while done < self.workers:
+                results = self.get(self.results)
+                if results is DONE:
+                    if self.stop.is_set():
+                        break
+                    done += 1
+                    continue
+                start = time.perf_counter()
+                self.sink.write(results)
+                stage.add(len(results), time.perf_counter() - start,
+                          sum(1 for result in results if result[2] is not None))
+        except BaseException as e:
+            self.fail(e)
+        finally:
+            self.stop.set()
+            for thread in threads:
+                thread.join()
+            if executor is not None:
+                executor.shutdown()
+            now = time.perf_counter()
+            for name in ("parse", "sink"):
+                self.stages[name].finished = now
+            self.sink.close()
+        if self.error is not None:
+            raise self.error
+        return self.metrics()
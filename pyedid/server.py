@@ -0,0 +1,319 @@
+# Local parse service, stdlib only.
+#
+#   python -m pyedid.server --port 8080
+#   python -m pyedid.server --unix /run/pyedid.sock --max-batch 512 --max-wait 2
+#
+# POST /parse with hex records, one per line, or one binary EDID (body starting with the EDID header). The response
+# holds one JSON line per record, in order: the parse() fields or {"error": reason, "offset": offset}. GET /stats
+# returns counters and latency percentiles.
+#
+# Handler threads do not parse. Their records are queued and a single batcher thread coalesces everything arriving
+# within max_wait ms (up to max_batch records) into one parse_dedup() call, behind an LRU cache of results shared by
+# all clients. Every response carries a Server-Timing header with the time spent queued and in the batch.
+
+
+import argparse
+import collections
+import json
+import os
+import queue
+import socketserver
+import stat
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyedid.batch import decode, parse_dedup
+from pyedid.edid import HEADER
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_WAIT = 2.0  # ms
+DEFAULT_CACHE_SIZE = 65536
+
+# Request bodies above this size are rejected
+MAX_BODY = 64 * 1024 * 1024
+
+# Latencies kept for the percentiles of GET /stats
+LATENCY_WINDOW = 10000
+
+
+class Pending:
+    # Records of one request waiting for their batch
+    __slots__ = ("records", "results", "submitted", "started", "finished", "done")
+
+    def __init__(self, records):
+        self.records = records
+        self.results = None
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.done = threading.Event()
+
+
+class Batcher:
+    def __init__(self, max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, checksum=True,
+                 cache_size=DEFAULT_CACHE_SIZE):
+        self.max_batch = max_batch
+        self.max_wait = max_wait / 1000
+        self.checksum = checksum
+        self.cache_size = cache_size
+        # binary EDID -> (parse() dict, error), only touched by the batcher thread
+        self.cache = collections.OrderedDict()
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.counters = collections.Counter()
+        self.thread = threading.Thread(target=self.run, name="pyedid-batcher", daemon=True)
+        self.thread.start()
+
+    def submit(self, records):
+        # Blocks until the batch is parsed and returns the Pending, whose results hold (parse() dict, None) or
+        # (None, (reason, offset)) per record, None if the batch failed. Results are shared, do not mutate them
+        pending = Pending(records)
+        self.queue.put(pending)
+        pending.done.wait()
+        with self.lock:
+            self.latencies.append(pending.finished - pending.submitted)
+        return pending
+
+    def close(self):
+        self.queue.put(None)
+        self.thread.join()
+
+    def run(self):
+        while True:
+            pending = self.queue.get()
+            if pending is None:
+                return
+            batch = [pending]
+            count = len(pending.records)
+            deadline = time.perf_counter() + self.max_wait
+            stop = False
+            while count < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    pending = self.queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if pending is None:
+                    stop = True
+                    break
+                batch.append(pending)
+                count += len(pending.records)
+            try:
+                self.process(batch)
+            except Exception:
+                # Fail this batch only, the requests get a 500 and the batcher keeps serving
+                with self.lock:
+                    self.counters["failed_batches"] += 1
+                for pending in batch:
+                    if not pending.done.is_set():
+                        pending.results = None
+                        pending.finished = time.perf_counter()
+                        pending.done.set()
+            if stop:
+                return
+
+    def process(self, batch):
+        started = time.perf_counter()
+        cache = self.cache
+        keys = []
+        misses = []
+        hits = 0
+        for pending in batch:
+            pending.started = started
+            for record in pending.records:
+                raw, error = decode(record)
+                if error is not None:
+                    keys.append((None, error))
+                    continue
+                key = raw if isinstance(raw, bytes) else bytes(raw)
+                keys.append(key)
+                if key in cache:
+                    cache.move_to_end(key)
+                    hits += 1
+                else:
+                    misses.append(key)
+
+        parsed = {}
+        if misses:
+            results, errors, _ = parse_dedup(misses, self.checksum)
+            errors = {error.index: (error.reason, error.offset) for error in errors}
+            for index, key in enumerate(misses):
+                parsed[key] = (results[index], errors.get(index))
+
+        position = 0
+        for pending in batch:
+            results = []
+            for _ in pending.records:
+                key = keys[position]
+                position += 1
+                if isinstance(key, tuple):
+                    results.append(key)
+                elif key in parsed:
+                    results.append(parsed[key])
+                else:
+                    results.append(cache[key])
+            pending.results = results
+
+        for key, result in parsed.items():
+            cache[key] = result
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+        finished = time.perf_counter()
+        with self.lock:
+            self.counters["batches"] += 1
+            self.counters["requests"] += len(batch)
+            self.counters["records"] += position
+            self.counters["cache_hits"] += hits
+        for pending in batch:
+            pending.finished = finished
+            pending.done.set()
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+            latencies = sorted(self.latencies)
+        batches = counters.get("batches", 0)
+        stats = {
+            "requests": counters.get("requests", 0),
+            "records": counters.get("records", 0),
+            "batches": batches,
+            "mean_batch": counters.get("records", 0) / batches if batches else 0.0,
+            "cache_hits": counters.get("cache_hits", 0),
+            "failed_batches": counters.get("failed_batches", 0),
+            "cache_size": len(self.cache),
+        }
+        for name, q in (("p50_us", 0.50), ("p99_us", 0.99)):
+            stats[name] = latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1e6 if latencies else None
+        return stats
+
+
+def split_records(body):
+    if body[:len(HEADER)] == HEADER:
+        return [body]
+    return [line.decode("ascii", "replace") for line in body.split(b"\n") if line.strip()]
+
+
+def result_line(result):
+    data, error = result
+    if error is not None:
+        return {"error": error[0], "offset": error[1]}
+    return data
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    verbose = False
+
+    def address_string(self):
+        # Unix socket peers have no address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            BaseHTTPRequestHandler.log_message(self, format, *args)
+
+    def send_body(self, status, body, content_type, headers=()):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_json(self, status, value):
+        self.send_body(status, json.dumps(value).encode() + b"\n", "application/json")
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self.send_json(200, self.server.batcher.stats())
+        else:
+            self.send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/parse":
+            self.send_json(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", ""))
+        except ValueError:
+            self.send_json(411, {"error": "Content-Length required"})
+            return
+        if length < 0:
+            self.send_json(400, {"error": "invalid Content-Length"})
+            self.close_connection = True
+            return
+        if length > MAX_BODY:
+            self.send_json(413, {"error": "request body too large"})
+            self.close_connection = True
+            return
+        records = split_records(self.rfile.read(length))
+        pending = self.server.batcher.submit(records)
+        if pending.results is None:
+            self.send_json(500, {"error": "parse failed"})
+            return
+        body = "".join(json.dumps(result_line(result)) + "\n" for result in pending.results).encode()
+        timing = "queue;dur=%.3f, batch;dur=%.3f" % ((pending.started - pending.submitted) * 1000,
+                                                    (pending.finished - pending.started) * 1000)
+        self.send_body(200, body, "application/x-ndjson", [("Server-Timing", timing)])
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address, batcher, verbose=False):
+    # HTTP server on a (host, port) tuple or a Unix socket path, not started yet
+    handler = type("Handler", (Handler,), {"verbose": verbose})
+    if isinstance(address, str):
+        # Replace a stale socket, never a regular file
+        if os.path.exists(address) and stat.S_ISSOCK(os.stat(address).st_mode):
+            os.unlink(address)
+        server = UnixHTTPServer(address, handler)
+    else:
+        server = ThreadingHTTPServer(address, handler)
+        server.daemon_threads = True
+    server.batcher = batcher
+    return server
+
+
+def serve(address=("127.0.0.1", 8080), max_batch=DEFAULT_MAX_BATCH, max_wait=DEFAULT_MAX_WAIT, checksum=True,
+          cache_size=DEFAULT_CACHE_SIZE, verbose=False):
+    batcher = Batcher(max_batch, max_wait, checksum, cache_size)
+    server = make_server(address, batcher, verbose)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        batcher.close()
+        if isinstance(address, str):
+            os.unlink(address)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyedid.server", description="Serve EDID parsing over local HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="listen address (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=8080, help="listen port (default: %(default)s)")
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="records per micro-batch (default: %(default)s)")
+    parser.add_argument("--max-wait", type=float, default=DEFAULT_MAX_WAIT,
+                        help="ms to wait for a micro-batch to fill (default: %(default)s)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_CACHE_SIZE,
+                        help="parsed EDIDs kept in the cache (default: %(default)s)")
+    parser.add_argument("--no-checksum", dest="checksum", action="store_false",
+                        help="accept blocks with bad checksums")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log every request to stderr")
+    args = parser.parse_args(argv)
+    address = args.unix if args.unix else (args.host, args.port)
+    serve(address, args.max_batch, args.max_wait, args.checksum, args.cache_size, args.verbose)
+
+
+if __name__ == "__main__":
+    main()
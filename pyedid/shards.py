@@ -0,0 +1,205 @@
+# Sharded parallel parsing of large JSONL files holding one host record with an EDID hex field per line.
+#
+#   python -m pyedid.shards telemetry.jsonl --field display.edid -j 16 -o parsed/telemetry
+#
+# The file is split into byte ranges aligned to line starts, and every worker process opens the file itself, seeks
+# to its range and extracts and parses the EDIDs there. The parent never reads the input, so there is no
+# single-threaded reader in front of the pool. Results are merged back in file order or written to one output file
+# per shard.
+
+
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+from pyedid.batch import parse_record
+
+# Reason codes besides the parse_batch() ones
+INVALID_JSON = "invalid_json"
+MISSING_FIELD = "missing_field"
+
+# Default shard sizes in bytes of input. Shards written to their own output file are streamed, merged shards travel
+# back to the parent as one list of output dicts (about 10x the input size with all parse() fields), so they are kept
+# small
+SHARD_BYTES = 64 << 20
+MERGE_SHARD_BYTES = 4 << 20
+
+# Merged shards in flight (queued, parsing or waiting to be yielded) per worker
+MERGE_WINDOW = 2
+
+
+def shard_ranges(path, count):
+    # Up to `count` (start, stop) byte ranges covering the file, each starting at the beginning of a line. A line
+    # belongs to the range its first byte falls in
+    size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, count):
+            position = size * i // count
+            if position <= bounds[-1]:
+                continue
+            # Move to the start of the next line unless position is one already
+            f.seek(position - 1)
+            f.readline()
+            position = f.tell()
+            if position >= size:
+                break
+            bounds.append(position)
+    bounds.append(size)
+    return [(bounds[i], bounds[i + 1]) for i in range(len(bounds) - 1) if bounds[i] < bounds[i + 1]]
+
+
+def extract(record, field):
+    # Value at a dotted field path, e.g. "display.edid", None if absent
+    for name in field.split("."):
+        if not isinstance(record, dict) or name not in record:
+            return None
+        record = record[name]
+    return record
+
+
+def output_line(source, data, error, fields=None):
+    if error is not None:
+        return {"source": source, "error": error[0], "offset": error[1]}
+    line = {"source": source}
+    if fields:
+        for name in fields:
+            line[name] = data.get(name)
+    else:
+        line.update(data)
+    return line
+
+
+def parse_lines(path, start, stop, field, checksum, fields):
+    # (failed, output dict) of the lines starting in [start, stop), with "path@offset" sources
+    with open(path, "rb") as f:
+        f.seek(start)
+        offset = start
+        while offset < stop:
+            line = f.readline()
+            if not line:
+                break
+            source = "%s@%d" % (path, offset)
+            offset += len(line)
+            if not line.strip():
+                continue
+            try:
+                hex_str = extract(json.loads(line), field)
+            except ValueError:
+                yield True, output_line(source, None, (INVALID_JSON, None))
+                continue
+            if not isinstance(hex_str, str):
+                yield True, output_line(source, None, (MISSING_FIELD, None))
+                continue
+            data, error = parse_record(hex_str, checksum)
+            yield error is not None, output_line(source, data, error, fields)
+
+
+def parse_shard(task):
+    # (records, errors, output dicts) of one shard; output dicts is None when they were written to output_path.
+    # Merged output keeps the failed flags: [(failed, output dict)]
+    path, start, stop, field, checksum, fields, output_path = task
+    records = errors = 0
+    lines = [] if output_path is None else None
+    out = open(output_path, "w") if output_path is not None else None
+    try:
+        for failed, line in parse_lines(path, start, stop, field, checksum, fields):
+            records += 1
+            errors += failed
+            if out is None:
+                lines.append((failed, line))
+            else:
+                out.write(json.dumps(line))
+                out.write("\n")
+    finally:
+        if out is not None:
+            out.close()
+    return records, errors, lines
+
+
+def tasks(path, field, workers, shards, checksum, fields, output=None, shard_bytes=SHARD_BYTES):
+    # Without an explicit shard count the file is split every shard_bytes, into at least one shard per worker
+    workers = workers or os.cpu_count() or 1
+    if not shards:
+        shards = max(workers, -(-os.path.getsize(path) // shard_bytes))
+    ranges = shard_ranges(path, shards)
+    return workers, [(path, start, stop, field, checksum, fields,
+                      None if output is None else "%s.%05d.jsonl" % (output, i))
+                     for i, (start, stop) in enumerate(ranges)]
+
+
+def merged(path, field="edid", workers=None, shards=None, checksum=True, fields=None):
+    # (failed, output dict) of every non-empty line in file order. At most MERGE_WINDOW shards per worker are in
+    # flight, so a slow consumer holds back the workers instead of piling up finished shards
+    workers, shard_tasks = tasks(path, field, workers, shards, checksum, fields, shard_bytes=MERGE_SHARD_BYTES)
+    if workers == 1 or len(shard_tasks) < 2:
+        for task in shard_tasks:
+            for item in parse_lines(*task[:-1]):
+                yield item
+        return
+    window = collections.deque()
+    shard_tasks = iter(shard_tasks)
+    with multiprocessing.Pool(workers) as pool:
+        for task in shard_tasks:
+            window.append(pool.apply_async(parse_shard, (task,)))
+            if len(window) < workers * MERGE_WINDOW:
+                continue
+            for item in window.popleft().get()[2]:
+                yield item
+        while window:
+            for item in window.popleft().get()[2]:
+                yield item
+
+
+def parse_jsonl(path, field="edid", workers=None, shards=None, checksum=True, fields=None):
+    # Yields one output dict per non-empty line, in file order: the parse() fields (or only `fields`) of the EDID hex
+    # string at `field`, or {"source", "error", "offset"} for lines that failed. Sources are "path@byte offset"
+    for _, line in merged(path, field, workers, shards, checksum, fields):
+        yield line
+
+
+def shard_jsonl(path, output, field="edid", workers=None, shards=None, checksum=True, fields=None):
+    # parse_jsonl() writing the output of shard i to "<output>.<i:05d>.jsonl" (concatenated in order they equal
+    # the merged output), creating the directory of `output` if needed. Returns [(output path, records, errors)] per
+    # shard
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    workers, shard_tasks = tasks(path, field, workers, shards, checksum, fields, output)
+    with multiprocessing.Pool(min(workers, len(shard_tasks)) or 1) as pool:
+        counts = pool.map(parse_shard, shard_tasks, 1)
+    return [(task[-1], records, errors) for task, (records, errors, _) in zip(shard_tasks, counts)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="pyedid.shards", description="Parse the EDIDs of a JSONL file in parallel")
+    parser.add_argument("input", help="JSONL file, one record per line")
+    parser.add_argument("--field", default="edid", help="dotted path of the EDID hex field (default: %(default)s)")
+    parser.add_argument("-j", "--jobs", type=int, default=0, help="worker processes (default: one per CPU)")
+    parser.add_argument("--shards", type=int,
+                        help="byte ranges to split the file into (default: one per 64 MiB, per 4 MiB when merging)")
+    parser.add_argument("-f", "--fields", type=lambda value: [name for name in value.split(",") if name],
+                        help="comma separated parse() fields to output (default: all)")
+    parser.add_argument("--no-checksum", dest="checksum", action="store_false",
+                        help="accept blocks with bad checksums")
+    parser.add_argument("-o", "--output", help="write shard i to OUTPUT.<i>.jsonl instead of merging to stdout")
+    args = parser.parse_args(argv)
+
+    if args.output:
+        shards = shard_jsonl(args.input, args.output, args.field, args.jobs, args.shards, args.checksum, args.fields)
+        errors = sum(shard[2] for shard in shards)
+        sys.stderr.write("%d records, %d errors in %d shards\n"
+                         % (sum(shard[1] for shard in shards), errors, len(shards)))
+    else:
+        errors = 0
+        for failed, line in merged(args.input, args.field, args.jobs, args.shards, args.checksum, args.fields):
+            errors += failed
+            sys.stdout.write(json.dumps(line))
+            sys.stdout.write("\n")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+# Single-flight parsing for threaded callers. Concurrent parse() calls for the same binary EDID are coalesced: the
+# first caller decodes it, the others block until it is done and get the same result. Nothing is cached once the
+# decode has finished, combine with a cache for repeated requests over time.
+
+
+import threading
+from pyedid.batch import decode, parse_record
+
+
+class Call:
+    # One in-flight decode
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, checksum=True, frozen=False):
+        # frozen: share read-only freeze() results instead of plain dicts
+        self.checksum = checksum
+        self.frozen = frozen
+        self.lock = threading.Lock()
+        # binary EDID -> Call
+        self.calls = {}
+        self.counters = {"calls": 0, "parses": 0, "coalesced": 0}
+
+    def parse(self, record):
+        # (parse() dict, None) or (None, (reason, offset)) for a hex string or binary EDID, like parse_record().
+        # Coalesced callers share the result, do not mutate it (or use frozen results)
+        raw, error = decode(record)
+        if error is not None:
+            with self.lock:
+                self.counters["calls"] += 1
+            return None, error
+        key = raw if isinstance(raw, bytes) else bytes(raw)
+
+        with self.lock:
+            self.counters["calls"] += 1
+            call = self.calls.get(key)
+            leader = call is None
+            if leader:
+                call = self.calls[key] = Call()
+                self.counters["parses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = parse_record(key, self.checksum, self.frozen)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[key]
+            call.done.set()
+        return call.result
+
+    def stats(self):
+        # calls: parse() calls, parses: decodes actually run, coalesced: calls that waited for another thread's decode
+        with self.lock:
+            return dict(self.counters)
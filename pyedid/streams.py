@@ -0,0 +1,148 @@
+# Input streams for the command line and bulk readers.
+#
+# open_input() detects gzip, bz2 and xz input by magic number and decompresses it incrementally on a background
+# thread, a bounded number of chunks ahead of the reader. zlib, bz2 and lzma release the GIL while decompressing, so
+# parsing in the reading thread overlaps with decompression and no temporary file is written.
+
+
+import io
+import os
+import queue
+import threading
+from pyedid.edid import HEADER
+
+# zlib, bz2 and lzma are optional modules of CPython builds, input in a missing format is read as it is
+try:
+    import gzip
+except ImportError:
+    gzip = None
+try:
+    import bz2
+except ImportError:
+    bz2 = None
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+# Magic number: opener of a decompressing file object
+COMPRESSIONS = ()
+if gzip is not None:
+    COMPRESSIONS += ((b"\x1f\x8b", gzip.open),)
+if bz2 is not None:
+    COMPRESSIONS += ((b"BZh", bz2.open),)
+if lzma is not None:
+    COMPRESSIONS += ((b"\xfd7zXZ\x00", lzma.open),)
+MAGIC_SIZE = 6
+
+# Raised by readers of unreadable, truncated or corrupt input
+INPUT_ERRORS = (OSError, EOFError)
+if lzma is not None:
+    INPUT_ERRORS += (lzma.LZMAError,)
+
+# Decompressed bytes per chunk and chunks decompressed ahead of the reader
+CHUNK = 1 << 20
+DEPTH = 8
+
+
+class BackgroundReader(io.RawIOBase):
+    # Raw binary stream reading `stream` on a background thread, up to `depth` chunks ahead. Closing it closes
+    # `stream` and the `closing` file objects
+    def __init__(self, stream, closing=(), chunk=CHUNK, depth=DEPTH):
+        io.RawIOBase.__init__(self)
+        self.stream = stream
+        self.closing = closing
+        self.chunk = chunk
+        self.queue = queue.Queue(depth)
+        self.pending = memoryview(b"")
+        self.eof = False
+        self.error = None
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="pyedid-reader", daemon=True)
+        self.thread.start()
+
+    def run(self):
+        try:
+            while True:
+                data = self.stream.read(self.chunk)
+                if not self.put(data) or not data:
+                    return
+        except Exception as e:
+            self.error = e
+            self.put(b"")
+
+    def put(self, data):
+        # False once the reader is closed
+        while not self.stop.is_set():
+            try:
+                self.queue.put(data, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        if not self.pending:
+            if self.eof:
+                return 0
+            data = self.queue.get()
+            if not data:
+                self.eof = True
+                if self.error is not None:
+                    raise self.error
+                return 0
+            self.pending = memoryview(data)
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+    def close(self):
+        if self.closed:
+            return
+        self.stop.set()
+        self.thread.join()
+        self.stream.close()
+        for f in self.closing:
+            f.close()
+        io.RawIOBase.close(self)
+
+
+def compression(head):
+    # Opener of the compression format starting with `head`, None for uncompressed data
+    for magic, opener in COMPRESSIONS:
+        if head[:len(magic)] == magic:
+            return opener
+    return None
+
+
+def open_input(source):
+    # Buffered binary stream over a path or a buffered binary file object (e.g. sys.stdin.buffer), decompressed when
+    # it starts with a gzip, bz2 or xz magic number. Uncompressed file objects are returned as they are
+    f = open(source, "rb") if isinstance(source, (str, bytes, os.PathLike)) else source
+    opener = compression(f.peek(MAGIC_SIZE)[:MAGIC_SIZE])
+    if opener is None:
+        return f
+    return io.BufferedReader(BackgroundReader(opener(f), (f,)), CHUNK)
+
+
+def read_records(stream, source):
+    # (source, record) pairs of a binary stream: the whole stream if it starts with the EDID header, otherwise every
+    # non-empty line as a hex record
+    if stream.peek(len(HEADER))[:len(HEADER)] == HEADER:
+        yield source, stream.read()
+        return
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if line:
+            yield "%s:%d" % (source, number), line.decode("ascii", "replace")
+
+
+def read_file(path):
+    # read_records() of a plain or compressed file
+    with open_input(path) as f:
+        for item in read_records(f, path):
+            yield item